@@ -0,0 +1,242 @@
+#! python3
+
+
+'''
+Synthetic DRF text charts for the benchmarks.
+
+Writes one chart file per race date, named <track code><YYYYMMDD>.txt inside a directory per
+date, the way get_chart_paths expects them. Each card has a header (H) record, a race (R)
+record per race and a starter (S) record per horse, plus the comment (C) and exotic
+wagering (E) records the parser has to skip. Surfaces, distances, field sizes, fractions
+and beaten lengths are drawn so the guides see sprints and routes on several courses.
+
+Column positions are not written down here: RecordLayout asks pydrf.textchart which column
+each field result_reporter reads comes from (see result_reporter.recordlayout), so the
+records are laid out the way the parser that reads them expects. Every file written is
+parsed back with pydrf and compared field by field, and generation stops with an error if
+pydrf reads anything other than what was written.
+
+    python benchmarks/drf_generator.py OUTPUT_DIR --days 365 --tracks CD KEE
+'''
+
+
+import argparse
+import csv
+from datetime import date, timedelta
+from functools import cache
+import os
+import random
+import sys
+
+try:
+    import result_reporter
+except ImportError:
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, 'src'))
+
+from pydrf.textchart import Header, RaceData, RecordType, StarterPerformanceData
+
+from result_reporter.recordlayout import find_field_columns, find_record_length
+
+
+HEADER_FIELD_NAMES: list[str] = ['track_code', 'race_date', 'number_of_races']
+
+RACE_FIELD_NAMES: list[str] = [
+    'track_code', 'race_date', 'race_number', 'breed_indicator', 'race_type', 'sex_restriction', 'age_restriction',
+    'maximum_claiming_price', 'purse', 'surface', 'course_type', 'distance', 'number_of_horses', 'fraction1',
+    'fraction2', 'fraction3', 'final_time',
+]
+
+STARTER_FIELD_NAMES: list[str] = [
+    'track_code', 'race_date', 'race_number', 'horse_name', 'post_position', 'official_finish', 'odds',
+    'length_behind_at_poc1', 'length_behind_at_poc2', 'length_behind_at_poc3', 'length_behind_at_finish',
+]
+
+# (surface, course type, weight): mostly dirt, then turf, then the rarer courses
+COURSES: list[tuple[str, str, int]] = [
+    ('D', 'D', 60),
+    ('T', 'T', 20),
+    ('D', 'E', 8),
+    ('T', 'I', 7),
+    ('T', 'O', 5),
+]
+# Distances in hundredths of a furlong
+SPRINT_DISTANCES: list[int] = [450, 500, 550, 600, 650, 700]
+ROUTE_DISTANCES: list[int] = [800, 850, 900, 1000, 1100, 1200]
+RACE_TYPES: list[str] = ['CLM', 'MCL', 'MSW', 'ALW', 'AOC', 'STK', 'G3']
+SECONDS_PER_FURLONG: float = 12.2
+
+
+class RecordLayout:
+    '''
+    Where pydrf reads each field of one record type from, and how many columns it needs.
+    '''
+    def __init__(self, record_class: type, record_type: str, names: list[str]):
+        columns: dict[str, int | None] = find_field_columns(record_class, record_type, names)
+        missing: list[str] = [name for name, column in columns.items() if column is None]
+        if missing:
+            raise ValueError(f'pydrf does not read {record_class.__name__} {", ".join(missing)} verbatim from a column')
+        self.record_class: type = record_class
+        self.record_type: str = record_type
+        self.columns: dict[str, int] = {name: column for name, column in columns.items() if column is not None}
+        self.length: int = find_record_length(record_class, record_type, max(self.columns.values()) + 1)
+
+    def get_record(self, values: dict[str, object]) -> str:
+        fields: list[str] = [''] * self.length
+        fields[0] = f'"{self.record_type}"'
+        for name, column in self.columns.items():
+            value: object = values[name]
+            fields[column] = f'"{value}"' if isinstance(value, str) else f'{value}'
+        return ','.join(fields)
+
+    def check(self, line: list[str]) -> str | None:
+        '''
+        None if pydrf reads back every field as written to line, else what it got wrong.
+        '''
+        record: object = self.record_class.create(line)
+        for name, column in self.columns.items():
+            written: str = line[column]
+            value: object = getattr(record, name)
+            if f'{value}' == written:
+                continue
+            try:
+                if float(value) == float(written):  # type: ignore
+                    continue
+            except (TypeError, ValueError):
+                pass
+            return f'{name} was written as {written!r} but read as {value!r}'
+        return None
+
+
+@cache
+def get_layouts() -> dict[str, RecordLayout]:
+    return {
+        layout.record_type: layout for layout in (
+            RecordLayout(Header, RecordType.HEADER.value, HEADER_FIELD_NAMES),
+            RecordLayout(RaceData, RecordType.RACE.value, RACE_FIELD_NAMES),
+            RecordLayout(StarterPerformanceData, RecordType.STARTER.value, STARTER_FIELD_NAMES),
+        )
+    }
+
+
+def check_round_trip(chart_path: str) -> None:
+    '''
+    Parse every header, race and starter record of chart_path with pydrf and raise ValueError
+    if any field does not come back as it was written.
+    '''
+    layouts: dict[str, RecordLayout] = get_layouts()
+    with open(chart_path) as chart_file:
+        for line_number, line in enumerate(csv.reader(chart_file), 1):
+            layout: RecordLayout | None = layouts.get(line[0]) if line else None
+            if layout is None:
+                continue
+            error: str | None = layout.check(line)
+            if error is not None:
+                raise ValueError(f'{chart_path}:{line_number}: {error}')
+
+
+def get_fractions(distance: int, rng: random.Random) -> tuple[float, float, float, float]:
+    '''
+    Leader's times at 2f, 4f and 6f (0 where the race is not that long) and the final time.
+    '''
+    furlongs: float = distance / 100
+    pace: float = rng.uniform(-0.6, 0.6)
+    fraction1: float = round(22.2 + pace + rng.uniform(-0.4, 0.4), 2)
+    fraction2: float = round(fraction1 + 23.4 + rng.uniform(-0.5, 0.7), 2)
+    fraction3: float = round(fraction2 + 24.6 + rng.uniform(-0.6, 0.8), 2) if furlongs > 6 else 0.0
+    final_time: float = round(furlongs * SECONDS_PER_FURLONG + pace + rng.uniform(-1.0, 1.5), 2)
+    return fraction1, fraction2, fraction3, final_time
+
+
+def get_card(track_code: str, race_date: str, rng: random.Random) -> list[str]:
+    number_of_races: int = rng.randint(8, 12)
+    layouts: dict[str, RecordLayout] = get_layouts()
+    lines: list[str] = [layouts[RecordType.HEADER.value].get_record({
+        'track_code': track_code,
+        'race_date': race_date,
+        'number_of_races': number_of_races,
+    })]
+    surfaces: list[tuple[str, str, int]] = COURSES
+    weights: list[int] = [weight for __, __, weight in surfaces]
+    for race_number in range(1, number_of_races + 1):
+        surface, course_type, __ = rng.choices(surfaces, weights)[0]
+        sprint: bool = rng.random() < (0.65 if surface == 'D' else 0.3)
+        distance: int = rng.choice(SPRINT_DISTANCES if sprint else ROUTE_DISTANCES)
+        number_of_horses: int = rng.randint(5, 14)
+        fraction1, fraction2, fraction3, final_time = get_fractions(distance, rng)
+        race_type: str = rng.choice(RACE_TYPES)
+        lines.append(layouts[RecordType.RACE.value].get_record({
+            'track_code': track_code,
+            'race_date': race_date,
+            'race_number': race_number,
+            'breed_indicator': 'TB' if rng.random() < 0.95 else 'QH',
+            'race_type': race_type,
+            'sex_restriction': rng.choice(['', 'F']),
+            'age_restriction': rng.choice(['2', '3', '3U', '4U']),
+            'maximum_claiming_price': rng.choice([5000, 10000, 25000, 50000]) if 'CL' in race_type else 0,
+            'purse': rng.choice([20000, 35000, 60000, 100000, 250000]),
+            'surface': surface,
+            'course_type': course_type,
+            'distance': distance,
+            'number_of_horses': number_of_horses,
+            'fraction1': fraction1,
+            'fraction2': fraction2,
+            'fraction3': fraction3,
+            'final_time': final_time,
+        }))
+        finish_order: list[int] = list(range(1, number_of_horses + 1))
+        rng.shuffle(finish_order)
+        # Starters come in finish order, as in the charts
+        for post_position, official_finish in sorted(enumerate(finish_order, 1), key=lambda item: item[1]):
+            behind: float = 0.0 if official_finish == 1 else official_finish * rng.uniform(60, 180)
+            lines.append(layouts[RecordType.STARTER.value].get_record({
+                'track_code': track_code,
+                'race_date': race_date,
+                'race_number': race_number,
+                'horse_name': f'Horse {race_date}{race_number:02d}{post_position:02d}',
+                'post_position': post_position,
+                'official_finish': official_finish,
+                'odds': rng.randint(40, 6000),
+                'length_behind_at_poc1': rng.randint(0, 1200),
+                'length_behind_at_poc2': rng.randint(0, 1000),
+                'length_behind_at_poc3': rng.randint(0, 800),
+                'length_behind_at_finish': int(behind),
+            }))
+        lines.append(f'"C","{track_code}","{race_date}",{race_number},"Broke alertly, drew clear late"')
+        lines.append(f'"E","{track_code}","{race_date}",{race_number},"Exacta",2.00,{rng.randint(10, 900)}.40')
+    return lines
+
+
+def generate(path: str, days: int, track_codes: list[str], start: date = date(2024, 1, 1), seed: int = 0) -> \
+        list[str]:
+    '''
+    Write days cards for every track under path and return the paths of the chart files.
+    Each file is checked with check_round_trip as it is written.
+    '''
+    rng: random.Random = random.Random(seed)
+    chart_paths: list[str] = []
+    for day in range(days):
+        race_date: str = (start + timedelta(days=day)).strftime('%Y%m%d')
+        dir_path: str = os.path.join(path, race_date)
+        os.makedirs(dir_path, exist_ok=True)
+        for track_code in track_codes:
+            chart_path: str = os.path.join(dir_path, f'{track_code}{race_date}.txt')
+            with open(chart_path, 'w') as chart_file:
+                chart_file.write('\n'.join(get_card(track_code, race_date, rng)) + '\n')
+            check_round_trip(chart_path)
+            chart_paths.append(chart_path)
+    return chart_paths
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Write synthetic DRF text charts')
+    parser.add_argument('path')
+    parser.add_argument('--days', type=int, default=365)
+    parser.add_argument('--tracks', nargs='+', default=['CD'])
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    chart_paths: list[str] = generate(args.path, args.days, args.tracks, seed=args.seed)
+    print(f'wrote {len(chart_paths)} charts to {args.path}')
+
+
+if __name__ == '__main__':
+    main()
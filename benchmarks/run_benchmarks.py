@@ -0,0 +1,237 @@
+#! python3
+
+
+'''
+Times the stages of building the guides from DRF text charts.
+
+Charts are generated with drf_generator (or read from --charts), then every stage is timed
+on its own, repeat times, keeping the best and median wall times:
+
+    parse_chart       parse every chart file (chart cache off)
+    chart             Chart construction from already parsed records
+    shakeup_reports   get_shakeup_reports over every chart
+    brohamer_reports  get_brohamer_reports over every chart
+    shakeup_fractions WinnerColumns.get_shakeup_fractions over the winners of every chart
+    aggregate         get_chart_aggregates over every chart
+    hearts_guide      create_hearts_guide, full and streaming backends
+    brohamer_guide    create_brohamer_guide, full and streaming backends
+    guides            create_guides (both guides in one pass), full and streaming backends
+    end_to_end        get_charts and create_guides, from the files
+
+The memory the models retain is measured with tracemalloc as well: bytes per race for the
+Charts (Chart and Race objects, not the pydrf records they hold) and bytes per report for the
+shake up and Brohamer reports.
+
+Results are written as JSON to benchmarks/results/, named after the time and the git commit,
+and --compare prints the ratio against an earlier results file.
+
+    python benchmarks/run_benchmarks.py --days 365 --repeat 5
+    python benchmarks/run_benchmarks.py --compare benchmarks/results/<earlier>.json
+'''
+
+
+import argparse
+from datetime import datetime
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Callable
+
+try:
+    import result_reporter
+except ImportError:
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, 'src'))
+
+from pydrf.textchart import Header, RaceData, StarterPerformanceData
+
+from result_reporter.chart import Chart
+from result_reporter.columnar import WinnerColumns
+from result_reporter.utils import (create_brohamer_guide, create_guides, create_hearts_guide, get_brohamer_reports,
+                                   get_chart_aggregates, get_chart_paths, get_charts, get_shakeup_reports,
+                                   iter_chart_records, parse_chart)
+
+from drf_generator import generate
+
+
+RESULTS_DIRECTORY: str = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results')
+
+
+def get_git_commit() -> str:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def time_stage(stage: Callable[[], object], repeat: int, setup: Callable[[], object] | None = None) -> \
+        dict[str, float | list[float]]:
+    times: list[float] = []
+    for __ in range(repeat):
+        if setup is not None:
+            setup()
+        start: float = time.perf_counter()
+        stage()
+        times.append(time.perf_counter() - start)
+    return {'best': min(times), 'median': statistics.median(times), 'times': times}
+
+
+def measure_retained(build: Callable[[], list]) -> tuple[list, int]:
+    '''
+    What build returns and the bytes still allocated once it has returned.
+    '''
+    tracemalloc.start()
+    try:
+        before: int = tracemalloc.get_traced_memory()[0]
+        built: list = build()
+        return built, tracemalloc.get_traced_memory()[0] - before
+    finally:
+        tracemalloc.stop()
+
+
+def measure_memory(cards: list[tuple[Header, list[RaceData], list[StarterPerformanceData]]],
+                   charts: list[Chart]) -> dict[str, dict[str, float]]:
+    memory: dict[str, dict[str, float]] = {}
+    races: int = sum(len(race_data) for __, race_data, __ in cards)
+    __, retained = measure_retained(lambda: [Chart(*card) for card in cards])
+    memory['chart'] = {'bytes': retained, 'items': races, 'per_item': retained / races if races else 0.0}
+    for name, get_reports in (('shakeup_reports', get_shakeup_reports), ('brohamer_reports', get_brohamer_reports)):
+        reports, retained = measure_retained(lambda: [report for chart in charts for report in get_reports(chart)])
+        memory[name] = {'bytes': retained, 'items': len(reports),
+                        'per_item': retained / len(reports) if reports else 0.0}
+    return memory
+
+
+def read_records(chart_paths: list[str]) -> list[tuple[Header, list[RaceData], list[StarterPerformanceData]]]:
+    cards: list[tuple[Header, list[RaceData], list[StarterPerformanceData]]] = []
+    for chart_path in chart_paths:
+        header: Header | None = None
+        race_data: list[RaceData] = []
+        starters: list[StarterPerformanceData] = []
+        with open(chart_path) as chart_file:
+            for record in iter_chart_records(chart_file):
+                if isinstance(record, StarterPerformanceData):
+                    starters.append(record)
+                elif isinstance(record, RaceData):
+                    race_data.append(record)
+                else:
+                    header = record
+        if header is not None:
+            cards.append((header, race_data, starters))
+    return cards
+
+
+def run(charts_path: str, track_code: str, repeat: int, output_directory: str) -> \
+        tuple[dict[str, dict], dict[str, dict[str, float]]]:
+    chart_paths: list[str] = get_chart_paths(charts_path, track_code)
+    charts: list[Chart] = [chart for chart in (parse_chart(chart_path) for chart_path in chart_paths) if chart]
+    cards = read_records(chart_paths)
+    stages: dict[str, dict] = {}
+
+    def remove(*paths: str) -> None:
+        for path in paths:
+            if os.path.exists(path):
+                os.remove(path)
+
+    hearts_path: str = os.path.join(output_directory, 'hearts.xlsx')
+    brohamer_path: str = os.path.join(output_directory, 'brohamer.xlsx')
+    stages['parse_chart'] = time_stage(lambda: [parse_chart(chart_path) for chart_path in chart_paths], repeat)
+    stages['chart'] = time_stage(lambda: [Chart(*card) for card in cards], repeat)
+    stages['shakeup_reports'] = time_stage(lambda: [get_shakeup_reports(chart) for chart in charts], repeat)
+    stages['brohamer_reports'] = time_stage(lambda: [get_brohamer_reports(chart) for chart in charts], repeat)
+    stages['shakeup_fractions'] = time_stage(
+        lambda: WinnerColumns.from_charts(charts).get_shakeup_fractions(), repeat
+    )
+    stages['aggregate'] = time_stage(lambda: list(get_chart_aggregates(charts)), repeat)
+    for streaming in (False, True):
+        suffix: str = '_streaming' if streaming else ''
+        stages[f'hearts_guide{suffix}'] = time_stage(
+            lambda: create_hearts_guide(charts, hearts_path, streaming), repeat, lambda: remove(hearts_path)
+        )
+        stages[f'brohamer_guide{suffix}'] = time_stage(
+            lambda: create_brohamer_guide(charts, brohamer_path, streaming), repeat, lambda: remove(brohamer_path)
+        )
+        stages[f'guides{suffix}'] = time_stage(
+            lambda: create_guides(charts, hearts_path, brohamer_path, streaming), repeat,
+            lambda: remove(hearts_path, brohamer_path)
+        )
+
+    def end_to_end() -> None:
+        create_guides(get_charts(charts_path, track_code), hearts_path, brohamer_path)
+
+    stages['end_to_end'] = time_stage(end_to_end, repeat, lambda: remove(hearts_path, brohamer_path))
+    return stages, measure_memory(cards, charts)
+
+
+def print_stages(stages: dict[str, dict], baseline: dict[str, dict] | None = None) -> None:
+    for name, timing in stages.items():
+        line: str = f'{name:<26}best {timing["best"]:9.4f}s  median {timing["median"]:9.4f}s'
+        if baseline and name in baseline:
+            line += f'  x{baseline[name]["best"] / timing["best"]:.2f} vs baseline'
+        print(line)
+
+
+def print_memory(memory: dict[str, dict[str, float]], baseline: dict[str, dict] | None = None) -> None:
+    for name, usage in memory.items():
+        unit: str = 'race' if name == 'chart' else 'report'
+        line: str = f'{name:<26}{usage["per_item"]:9.1f} bytes per {unit}'
+        if baseline and name in baseline and usage['per_item']:
+            line += f'  x{baseline[name]["per_item"] / usage["per_item"]:.2f} vs baseline'
+        print(line)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Benchmark the result_reporter stages')
+    parser.add_argument('--charts', help='existing chart directory; synthetic charts are generated if omitted')
+    parser.add_argument('--track', default='CD')
+    parser.add_argument('--days', type=int, default=120)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', default=RESULTS_DIRECTORY, help='directory for the JSON results')
+    parser.add_argument('--compare', help='earlier results file to compare against')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as scratch:
+        charts_path: str = args.charts
+        if charts_path is None:
+            charts_path = os.path.join(scratch, 'charts')
+            generate(charts_path, args.days, [args.track], seed=args.seed)
+        stages, memory = run(charts_path, args.track, args.repeat, scratch)
+
+    baseline: dict[str, dict] | None = None
+    memory_baseline: dict[str, dict] | None = None
+    if args.compare:
+        with open(args.compare) as baseline_file:
+            baseline_results: dict = json.load(baseline_file)
+        baseline = baseline_results['stages']
+        memory_baseline = baseline_results.get('memory')
+    print_stages(stages, baseline)
+    print_memory(memory, memory_baseline)
+
+    commit: str = get_git_commit()
+    results: dict[str, object] = {
+        'commit': commit,
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'parameters': {
+            'charts': args.charts, 'track': args.track, 'days': args.days, 'repeat': args.repeat, 'seed': args.seed
+        },
+        'stages': stages,
+        'memory': memory,
+    }
+    os.makedirs(args.output, exist_ok=True)
+    results_path: str = os.path.join(args.output, f'{datetime.now():%Y%m%d-%H%M%S}-{commit}.json')
+    with open(results_path, 'w') as results_file:
+        json.dump(results, results_file, indent=2)
+    print(f'results written to {results_path}')
+
+
+if __name__ == '__main__':
+    main()
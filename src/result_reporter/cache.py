@@ -0,0 +1,155 @@
+#! python3
+
+
+import hashlib
+import os
+import pickle
+import tempfile
+
+from .chart import Chart
+
+
+CACHE_VERSION: int = 2
+CACHE_ENTRY_SUFFIX: str = '.chart'
+CACHE_DISABLE_VARIABLE: str = 'RESULT_REPORTER_NO_CHART_CACHE'
+DEFAULT_CACHE_DIRECTORY: str = os.path.join(os.path.expanduser('~'), '.cache', 'result_reporter', 'charts')
+DEFAULT_MAXIMUM_CACHE_SIZE: int = 256 * 1024 * 1024
+
+
+def get_content_digest(path: str) -> str:
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as chart_file:
+        while chunk := chart_file.read(1 << 20):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ChartFingerprint:
+    def __init__(self, path: str, size: int, mtime_ns: int, digest: str):
+        self.path: str = path
+        self.size: int = size
+        self.mtime_ns: int = mtime_ns
+        self.digest: str = digest
+
+    @staticmethod
+    def create(path: str) -> 'ChartFingerprint':
+        stat: os.stat_result = os.stat(path)
+        return ChartFingerprint(os.path.abspath(path), stat.st_size, stat.st_mtime_ns, get_content_digest(path))
+
+    def __str__(self):
+        ret = ''
+        for k, v in vars(self).items():
+            ret += f'{k}={v}, '
+        return f'ChartFingerprint({ret[:-2]})'
+
+    def __repr__(self):
+        ret = ''
+        for k, v in vars(self).items():
+            ret += f'{k}={v}, '
+        return f'ChartFingerprint({ret[:-2]})'
+
+
+class ChartCache:
+    '''
+    On-disk cache of parsed charts.
+
+    Each chart file owns one entry per parse variant (e.g. winners only), named after its
+    absolute path, holding the file's fingerprint (size, mtime and content digest) followed by
+    the pickled Chart. An entry is used while size and mtime still match; if only the mtime
+    moved the content digest decides, and anything else is a miss that gets overwritten by the
+    next store. Entries are touched on every hit and the least recently used ones are evicted
+    once the directory grows past maximum_size bytes.
+
+    Set enabled=False, or the RESULT_REPORTER_NO_CHART_CACHE environment variable, to bypass it.
+    '''
+    def __init__(self, directory: str = DEFAULT_CACHE_DIRECTORY, maximum_size: int = DEFAULT_MAXIMUM_CACHE_SIZE,
+                 enabled: bool = True):
+        self.directory: str = directory
+        self.maximum_size: int = maximum_size
+        self.enabled: bool = enabled and not os.environ.get(CACHE_DISABLE_VARIABLE)
+        self._size: int | None = None
+
+    def get_entry_path(self, path: str, variant: str = '') -> str:
+        name: str = hashlib.blake2b(f'{os.path.abspath(path)}|{variant}'.encode(), digest_size=16).hexdigest()
+        return os.path.join(self.directory, f'{name}{CACHE_ENTRY_SUFFIX}')
+
+    def load(self, path: str, variant: str = '') -> Chart | None:
+        if not self.enabled:
+            return None
+        entry_path: str = self.get_entry_path(path, variant)
+        try:
+            stat: os.stat_result = os.stat(path)
+            with open(entry_path, 'rb') as entry_file:
+                version, fingerprint = pickle.load(entry_file)
+                if version != CACHE_VERSION or fingerprint.path != os.path.abspath(path) or \
+                        fingerprint.size != stat.st_size:
+                    return None
+                if fingerprint.mtime_ns != stat.st_mtime_ns and fingerprint.digest != get_content_digest(path):
+                    return None
+                chart: Chart = pickle.load(entry_file)
+        except (OSError, EOFError, pickle.UnpicklingError, AttributeError, ValueError, TypeError):
+            return None
+        if fingerprint.mtime_ns != stat.st_mtime_ns:
+            # Same content under a new mtime; re-stamp the entry so the next lookup skips the digest
+            self.store(path, chart, variant)
+        else:
+            os.utime(entry_path)
+        return chart
+
+    def store(self, path: str, chart: Chart, variant: str = '') -> None:
+        if not self.enabled:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        fingerprint: ChartFingerprint = ChartFingerprint.create(path)
+        entry_path: str = self.get_entry_path(path, variant)
+        previous_size: int = os.path.getsize(entry_path) if os.path.exists(entry_path) else 0
+        descriptor, temp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        with os.fdopen(descriptor, 'wb') as entry_file:
+            pickle.dump((CACHE_VERSION, fingerprint), entry_file, protocol=pickle.HIGHEST_PROTOCOL)
+            pickle.dump(chart, entry_file, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temp_path, entry_path)
+        if self._size is None:
+            self._size = self.get_size()
+        else:
+            self._size += os.path.getsize(entry_path) - previous_size
+        if self._size > self.maximum_size:
+            self.evict()
+
+    def get_size(self) -> int:
+        size: int = 0
+        if os.path.isdir(self.directory):
+            with os.scandir(self.directory) as entries:
+                for entry in entries:
+                    if entry.name.endswith(CACHE_ENTRY_SUFFIX):
+                        size += entry.stat().st_size
+        return size
+
+    def evict(self) -> None:
+        '''
+        Remove least recently used entries until the cache fits in maximum_size.
+        '''
+        entries: list[tuple[int, int, str]] = []
+        with os.scandir(self.directory) as scan:
+            for entry in scan:
+                if entry.name.endswith(CACHE_ENTRY_SUFFIX):
+                    stat: os.stat_result = entry.stat()
+                    entries.append((stat.st_mtime_ns, stat.st_size, entry.path))
+        entries.sort()
+        size: int = sum(entry[1] for entry in entries)
+        for __, entry_size, entry_path in entries:
+            if size <= self.maximum_size:
+                break
+            try:
+                os.remove(entry_path)
+            except FileNotFoundError:
+                pass
+            size -= entry_size
+        self._size = size
+
+    def clear(self) -> None:
+        if os.path.isdir(self.directory):
+            with os.scandir(self.directory) as entries:
+                for entry in entries:
+                    if entry.name.endswith(CACHE_ENTRY_SUFFIX):
+                        os.remove(entry.path)
+        self._size = 0
@@ -6,29 +6,30 @@ from pydrf.textchart import Header, RaceData, StarterPerformanceData
 from .race import Race
 
 
+def get_finish_sort_key(starter: StarterPerformanceData) -> tuple[bool, int]:
+    return (not starter.official_finish, starter.official_finish or 0)
+
+
 class Chart:
+    __slots__ = ('track_code', 'race_date', 'number_of_races', 'races')
+
     def __init__(self, header: Header, races: list[RaceData], starters: list[StarterPerformanceData]):
         self.track_code: str = header.track_code
         self.race_date: str = header.race_date
         self.number_of_races: int = header.number_of_races
+        horses_by_race: dict[int, list[StarterPerformanceData]] = {}
+        for starter in starters:
+            horses_by_race.setdefault(starter.race_number, []).append(starter)
+        for horses in horses_by_race.values():
+            # Stable, so dead heats keep chart order; starters without an official finish go last
+            horses.sort(key=get_finish_sort_key)
         self.races: list[Race] = []
         for race in races:
-            data = race
-            race_number = race.race_number
-            horses: list[StarterPerformanceData] = []
-            for starter in starters:
-                if starter.race_number == race_number:
-                    horses.append(starter)
-            self.races.append(Race(data, horses))
+            self.races.append(Race(race, horses_by_race.get(race.race_number, [])))
 
     def __str__(self):
-        ret = ''
-        for k, v in vars(self).items():
-            ret += f'{k}={v}, '
-        return f'Chart({ret[:-2]})'
+        fields: str = ', '.join([f'{k}={getattr(self, k)}' for k in self.__slots__])
+        return f'Chart({fields})'
 
     def __repr__(self):
-        ret = ''
-        for k, v in vars(self).items():
-            ret += f'{k}={v}, '
-        return f'Chart({ret[:-2]})'
+        return self.__str__()
@@ -0,0 +1,223 @@
+#! python3
+
+
+from typing import Iterable
+
+import numpy as np
+from pydrf.textchart import StarterPerformanceData
+
+from .chart import Chart
+from .report import DEFAULT_MAXIMUM_SPRINT_DISTANCE, FEET_PER_BEATEN_LENGTH
+
+
+def python_round(values: np.ndarray, digits: int) -> np.ndarray:
+    '''
+    Round every element the way the builtin round() does.
+
+    np.round rounds half to even on the value scaled by 10 ** digits, while round() rounds
+    the exact binary value, so the two can disagree for values that sit on a half. Those few
+    elements are re-rounded with round() itself; everything else already agrees.
+    '''
+    rounded: np.ndarray = np.round(values, digits)
+    scaled: np.ndarray = values * (10.0 ** digits)
+    suspects: np.ndarray = np.isfinite(scaled) & (np.abs(scaled - np.floor(scaled) - 0.5) < 1e-6)
+    for index in np.flatnonzero(suspects):
+        rounded[index] = round(float(values[index]), digits)
+    return rounded
+
+
+def _float_column(values: list[float | None] | np.ndarray) -> np.ndarray:
+    if isinstance(values, np.ndarray):
+        return values.astype(np.float64)
+    # pydrf leaves missing calls and fractions empty; BrohamerReport treats those like 0
+    return np.array([0.0 if value is None else value for value in values], dtype=np.float64)
+
+
+class WinnerColumns:
+    '''
+    Columnar store of the winner of every thoroughbred race in a set of charts.
+
+    Race level fields (distance, fractions, final time) and the winner's beaten lengths are
+    kept raw, in the units pydrf reports them, one NumPy array per field, so figures for many
+    seasons of races can be computed in a single vectorized pass.
+    '''
+    def __init__(self, keys: list[str], race_dates: list[str], race_numbers: list[int], race_types: list[str],
+                 surfaces: list[str], courses: list[str], distance: list[float], post_position: list[int],
+                 odds: list[float], fraction1: list[float], fraction2: list[float], fraction3: list[float],
+                 final_time: list[float], bl_poc1: list[float], bl_poc2: list[float], bl_poc3: list[float],
+                 bl_finish: list[float]):
+        self.keys: np.ndarray = np.array(keys, dtype=np.str_)
+        self.race_dates: np.ndarray = np.array(race_dates, dtype=np.str_)
+        self.race_numbers: np.ndarray = np.array(race_numbers, dtype=np.int64)
+        self.race_types: np.ndarray = np.array(race_types, dtype=np.str_)
+        self.surfaces: np.ndarray = np.array(surfaces, dtype=np.str_)
+        self.courses: np.ndarray = np.array(courses, dtype=np.str_)
+        self.distance: np.ndarray = _float_column(distance)
+        self.post_position: np.ndarray = np.array(post_position, dtype=np.int64)
+        self.odds: np.ndarray = _float_column(odds)
+        self.fraction1: np.ndarray = _float_column(fraction1)
+        self.fraction2: np.ndarray = _float_column(fraction2)
+        self.fraction3: np.ndarray = _float_column(fraction3)
+        self.final_time: np.ndarray = _float_column(final_time)
+        self.bl_poc1: np.ndarray = _float_column(bl_poc1)
+        self.bl_poc2: np.ndarray = _float_column(bl_poc2)
+        self.bl_poc3: np.ndarray = _float_column(bl_poc3)
+        self.bl_finish: np.ndarray = _float_column(bl_finish)
+
+    @staticmethod
+    def from_charts(charts: Iterable[Chart]) -> 'WinnerColumns':
+        columns: dict[str, list] = {
+            name: [] for name in (
+                'keys', 'race_dates', 'race_numbers', 'race_types', 'surfaces', 'courses', 'distance',
+                'post_position', 'odds', 'fraction1', 'fraction2', 'fraction3', 'final_time',
+                'bl_poc1', 'bl_poc2', 'bl_poc3', 'bl_finish'
+            )
+        }
+        for chart in charts:
+            for race in chart.races:
+                if race.data.breed_indicator != 'TB' or not race.starters:
+                    continue
+                winner: StarterPerformanceData = race.starters[0]
+                columns['keys'].append(f'{chart.race_date}{race.data.race_number:02d}')
+                columns['race_dates'].append(chart.race_date)
+                columns['race_numbers'].append(race.data.race_number)
+                columns['race_types'].append(race.data.race_type)
+                columns['surfaces'].append(race.data.surface)
+                columns['courses'].append(race.data.course_type)
+                columns['distance'].append(race.data.distance)
+                columns['post_position'].append(winner.post_position)
+                columns['odds'].append(winner.odds)
+                columns['fraction1'].append(race.data.fraction1)
+                columns['fraction2'].append(race.data.fraction2)
+                columns['fraction3'].append(race.data.fraction3)
+                columns['final_time'].append(race.data.final_time)
+                columns['bl_poc1'].append(winner.length_behind_at_poc1)
+                columns['bl_poc2'].append(winner.length_behind_at_poc2)
+                columns['bl_poc3'].append(winner.length_behind_at_poc3)
+                columns['bl_finish'].append(winner.length_behind_at_finish)
+        return WinnerColumns(**columns)
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def select(self, mask: np.ndarray) -> 'WinnerColumns':
+        return WinnerColumns(**{name: column[mask] for name, column in vars(self).items()})
+
+    def between(self, start: str, end: str) -> 'WinnerColumns':
+        '''
+        The winners raced from start to end inclusive, both given as YYYYMMDD like Chart.race_date.
+        '''
+        return self.select((self.race_dates >= start) & (self.race_dates <= end))
+
+    def get_shakeup_fractions(self) -> 'ShakeUpFractions':
+        return compute_shakeup_fractions(
+            fr1=self.fraction1,
+            fr2=self.fraction2,
+            fr3=self.fraction3,
+            bl1=self.bl_poc1,
+            bl2=self.bl_poc2,
+            bl3=self.bl_poc3,
+            blf=self.bl_finish,
+            distance=self.distance,
+            finish=self.final_time
+        )
+
+    def get_brohamer_figures(self) -> 'BrohamerFigures':
+        # The same call selection as get_brohamer_reports: 2f/4f for sprints, 4f/6f for routes
+        sprint: np.ndarray = self.distance / 100 <= DEFAULT_MAXIMUM_SPRINT_DISTANCE
+        return compute_brohamer_figures(
+            distance=self.distance,
+            c1=np.where(sprint, self.fraction1, self.fraction2),
+            c2=np.where(sprint, self.fraction2, self.fraction3),
+            fc=self.final_time,
+            bl1=np.where(sprint, self.bl_poc1, self.bl_poc2),
+            bl2=np.where(sprint, self.bl_poc2, self.bl_poc3)
+        )
+
+
+class BrohamerFigures:
+    def __init__(self, distance: np.ndarray, bl1: np.ndarray, bl2: np.ndarray,
+                 fr1: np.ndarray, fr2: np.ndarray, fr3: np.ndarray, ep: np.ndarray, sp: np.ndarray,
+                 ap: np.ndarray, fx: np.ndarray, energy: np.ndarray):
+        self.distance: np.ndarray = distance
+        self.bl1: np.ndarray = bl1
+        self.bl2: np.ndarray = bl2
+        self.fr1: np.ndarray = fr1
+        self.fr2: np.ndarray = fr2
+        self.fr3: np.ndarray = fr3
+        self.ep: np.ndarray = ep
+        self.sp: np.ndarray = sp
+        self.ap: np.ndarray = ap
+        self.fx: np.ndarray = fx
+        self.energy: np.ndarray = energy
+
+    def __len__(self) -> int:
+        return len(self.distance)
+
+
+class ShakeUpFractions:
+    def __init__(self, distance: np.ndarray, fr1: np.ndarray, fr2: np.ndarray, fr3: np.ndarray, finish: np.ndarray):
+        self.distance: np.ndarray = distance
+        self.fr1: np.ndarray = fr1
+        self.fr2: np.ndarray = fr2
+        self.fr3: np.ndarray = fr3
+        self.finish: np.ndarray = finish
+
+    def __len__(self) -> int:
+        return len(self.distance)
+
+
+def compute_shakeup_fractions(fr1: np.ndarray, fr2: np.ndarray, fr3: np.ndarray, bl1: np.ndarray, bl2: np.ndarray,
+                              bl3: np.ndarray, blf: np.ndarray, distance: np.ndarray, finish: np.ndarray) -> \
+        ShakeUpFractions:
+    '''
+    Vectorized ShakeUpReport: adjusts the fractions of every race by the winner's beaten
+    lengths at each call and floors them to tenths, matching ShakeUpReport element for element.
+    The third fraction is the adjusted final time at exactly 6f and NaN under 6f.
+    '''
+    distance = python_round(np.asarray(distance, dtype=np.float64) / 100, 1)
+    finish = np.asarray(finish, dtype=np.float64)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        time_of_beaten_length: np.ndarray = finish / ((distance * 660) / FEET_PER_BEATEN_LENGTH)
+        adjusted_fr1: np.ndarray = np.floor((fr1 + time_of_beaten_length * (np.asarray(bl1) / 100)) * 10) / 10
+        adjusted_fr2: np.ndarray = np.floor((fr2 + time_of_beaten_length * (np.asarray(bl2) / 100)) * 10) / 10
+        adjusted_finish: np.ndarray = np.floor((finish + time_of_beaten_length * (np.asarray(blf) / 100)) * 10) / 10
+        adjusted_fr3: np.ndarray = np.floor((fr3 + time_of_beaten_length * (np.asarray(bl3) / 100)) * 10) / 10
+    adjusted_fr3 = np.where(distance > 6, adjusted_fr3, np.where(distance == 6, adjusted_finish, np.nan))
+    return ShakeUpFractions(distance, adjusted_fr1, adjusted_fr2, adjusted_fr3, adjusted_finish)
+
+
+def compute_brohamer_figures(distance: np.ndarray, c1: np.ndarray, c2: np.ndarray, fc: np.ndarray,
+                             bl1: np.ndarray, bl2: np.ndarray) -> BrohamerFigures:
+    '''
+    Vectorized BrohamerReport: takes the same raw arguments as BrohamerReport, one array
+    element per race, and returns every figure for every race at once.
+
+    Results match BrohamerReport element for element, including the rounding and the NaN
+    rules (races under 5f, missing first or second call). Where BrohamerReport would raise
+    ZeroDivisionError the figure comes back as inf or NaN instead.
+    '''
+    distance = python_round(np.asarray(distance, dtype=np.float64) / 100, 1)
+    bl1 = python_round(np.asarray(bl1, dtype=np.float64) / 100, 2)
+    bl2 = python_round(np.asarray(bl2, dtype=np.float64) / 100, 2)
+    c1 = np.asarray(c1, dtype=np.float64)
+    c2 = np.asarray(c2, dtype=np.float64)
+    fc = np.asarray(fc, dtype=np.float64)
+    sprint: np.ndarray = distance <= DEFAULT_MAXIMUM_SPRINT_DISTANCE
+    with np.errstate(divide='ignore', invalid='ignore'):
+        fr1: np.ndarray = python_round(np.where(sprint, 1320 - 10 * bl1, 2640 - 10 * bl1) / c1, 1)
+        fr2: np.ndarray = python_round((1320 - 10 * (bl2 - bl1)) / (c2 - c1), 1)
+        fr3: np.ndarray = python_round(
+            np.where(sprint, 660 * (distance - 4) + 10 * bl2, 660 * (distance - 6) + 10 * bl2) / (fc - c2), 1
+        )
+        ep: np.ndarray = python_round(np.where(sprint, 2640 - 10 * bl2, 3960 - 10 * bl2) / c2, 1)
+        sp: np.ndarray = python_round((ep + fr3) / 2, 1)
+        ap: np.ndarray = np.where(sprint, python_round((fr1 + fr2 + fr3) / 3, 1), python_round((fr1 + fr3) / 2, 1))
+        fx: np.ndarray = python_round((fr1 + fr3) / 2, 1)
+        energy: np.ndarray = np.where(
+            sprint, python_round(ep / (ep + fr3), 2), python_round(ep / (ep + fr3), 1)
+        )
+    missing: np.ndarray = (distance < 5.0) | (c1 == 0) | (c2 == 0)
+    for figure in (fr1, fr2, fr3, ep, sp, ap, fx, energy):
+        figure[missing] = np.nan
+    return BrohamerFigures(distance, bl1, bl2, fr1, fr2, fr3, ep, sp, ap, fx, energy)
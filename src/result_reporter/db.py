@@ -1,20 +1,36 @@
 #! python3
 
 
-from math import nan
+from typing import Callable
+
 from mssql_python.exceptions import IntegrityError
 
-from mssql_python import connect, Connection, Cursor
+from .pool import ConnectionPool
+from .recordcache import RecordCache
+from .storage import StorageBackend, StorageSession, T
+
+
+MAXIMUM_ROWS_PER_VALUES: int = 1000  # SQL Server's limit on a table value constructor
+
 
-from .coursetype import CourseType
-from .racetype import RaceType
+class ResultDatabaseManager(StorageBackend):
+    '''
+    Reads and writes the results tables in SQL Server over a ConnectionPool, so report jobs
+    running in parallel threads can share one manager. Every statement runs on the pooled
+    connection's open cursor, and the INSERT and SELECT text is built once per table, so the
+    driver can reuse the prepared statements.
+    '''
+    integrity_errors: tuple[type[Exception], ...] = (IntegrityError,)
 
+    def __init__(self, sql_connection_string: str, pool_size: int = 1, pool: ConnectionPool | None = None,
+                 record_cache: RecordCache | None = None):
+        super().__init__(record_cache)
+        self.pool: ConnectionPool = pool if pool is not None else ConnectionPool(sql_connection_string, pool_size)
 
-class ResultDatabaseManager:
-    def __init__(self, sql_connection_string: str):
-        self.connection: Connection = connect(sql_connection_string)
+    def run(self, operation: Callable[[StorageSession], T]) -> T:
+        return self.pool.run(operation)
 
-    def create_table_if_not_exists(self, table_name: str, columns: list[tuple[str, str]]) -> None:
+    def get_create_table_string(self, table_name: str, columns: list[tuple[str, str]]) -> str:
         execution_string: str = f'IF NOT EXISTS (SELECT * FROM INFORMATION_SCHEMA.TABLES WHERE '\
                                 f'TABLE_NAME = \'{table_name}\')'\
                                 f'BEGIN CREATE TABLE {table_name}('
@@ -25,84 +41,36 @@ class ResultDatabaseManager:
             execution_string += f'{name} {datatype},'
         execution_string = execution_string[:-1]
         execution_string += ') END'
-        cursor: Cursor = self.connection.cursor()
-        cursor.execute(execution_string)
-        self.connection.commit()
-        cursor.close()
+        return execution_string
 
-    def get_column_names(self, table_name: str) -> list[str]:
-        column_names: list[str] = []
-        query_string: str = f'SELECT COLUMN_NAME FROM INFORMATION_SCHEMA.COLUMNS WHERE '\
-                            f'TABLE_NAME = \'{table_name}\' ORDER BY ORDINAL_POSITION;'
-        cursor: Cursor = self.connection.cursor()
-        cursor.execute(query_string)
-        rows = cursor.fetchall()
-        for row in rows:
-            column_names.append(row[0])
-        cursor.close()
-        return column_names
+    def get_create_long_table_string(self, table_name: str) -> str:
+        return f'IF NOT EXISTS (SELECT * FROM INFORMATION_SCHEMA.TABLES WHERE '\
+               f'TABLE_NAME = \'{table_name}\')'\
+               f'BEGIN CREATE TABLE {table_name}('\
+               f'DATE DATE NOT NULL,'\
+               f'COURSE TINYINT NOT NULL,'\
+               f'RACE_TYPE TINYINT NOT NULL,'\
+               f'STAT VARCHAR(8) NOT NULL,'\
+               f'VALUE FLOAT NULL,'\
+               f'TEXT NVARCHAR(MAX) NULL,'\
+               f'CONSTRAINT PK_{table_name} PRIMARY KEY CLUSTERED (COURSE, RACE_TYPE, DATE, STAT)'\
+               f') END'
 
-    def add_record(self, table_name: str, values: list[tuple[float, float] | str]) -> None:
-        '''
-        Add a row to the given database.
+    def get_column_names_string(self, table_name: str) -> str:
+        return f'SELECT COLUMN_NAME FROM INFORMATION_SCHEMA.COLUMNS WHERE '\
+               f'TABLE_NAME = \'{table_name}\' ORDER BY ORDINAL_POSITION;'
 
-        values are passed in as a list in the following format:
-            date_str, (min_fr1, max_fr1), (min_fr2, max_fr2), (min_fr3, max_fr3), comment, ...
-        so the length of values should be equal to (len(column_names) - 2) / 2
-        '''
-        column_names: list[str] = self.get_column_names(table_name)
-        assert ((len(values) - 1) / 8) == ((len(column_names) - 1) / 14)
-        n_surfaces: float = (len(values) - 1) / 8
-        assert (n_surfaces % 1) == 0
-        execution_string: str = f'INSERT INTO {table_name} ('
-        for column_name in column_names:
-            execution_string += f'{column_name},'
-        execution_string = execution_string[:-1] + ') VALUES ('
-        count: int = int(n_surfaces)
-        row_str: str = '?,'
-        row_vals: list[str | float] = [f'{values[0]}']
-        for i in range(1, count * 8 + 1):
-            if type(values[i]) is str:
-                row_vals.append(values[i])  # type: ignore
-                row_str += '?,'
-            elif type(values[i]) is tuple:
-                row_vals.append(values[i][0])
-                row_vals.append(values[i][1])
-                row_str += '?,?,'
-        execution_string += row_str[:-1] + ');'
-        clean_row_vals: list[str | float] = [0.0 if val is nan else val for val in row_vals]
-        cursor: Cursor = self.connection.cursor()
-        try:
-            cursor.execute(execution_string, clean_row_vals)
-        except IntegrityError:
-            pass
-        self.connection.commit()
-        cursor.close()
+    def get_existing_indices(self, session: StorageSession, table_name: str, dates: list[str]) -> set[int]:
+        existing: set[int] = set()
+        for start in range(0, len(dates), MAXIMUM_ROWS_PER_VALUES):
+            chunk: list[str] = dates[start:start + MAXIMUM_ROWS_PER_VALUES]
+            rows_string: str = ','.join(f'({start + i},?)' for i in range(len(chunk)))
+            query_string: str = f'SELECT v.I FROM (VALUES {rows_string}) AS v(I, D) '\
+                                f'JOIN {table_name} t ON t.DATE = CAST(v.D AS DATE);'
+            session.execute(query_string, chunk)
+            for row in session.fetchall():
+                existing.add(int(row[0]))
+        return existing
 
-    def get_record(self, table_name: str, race_date: str, course: CourseType, race_type: RaceType) -> list[float | str]:
-        ret: list[float | str] = []
-        query_string: str = f'SELECT * FROM {table_name} WHERE DATE = ?'
-        cursor: Cursor = self.connection.cursor()
-        cursor.execute(query_string, [race_date])
-        fetch_result = cursor.fetchall()
-        if cursor.description:
-            column_names: list[str] = [
-                description[0] for description in cursor.description
-            ]
-            results: list[str | float] = [
-                result for result in fetch_result[0]
-            ]
-            course_str: str = course.course_to_str().upper().replace(' ', '_')
-            temp = list(zip(column_names, results))
-            ret_list = [
-                val[1] for val in temp if course_str in val[0]
-            ]
-            cursor.close()
-        if ret_list:
-            if race_type is RaceType.SPRINT:
-                ret = ret_list[:7]
-            elif race_type is RaceType.ROUTE:
-                ret = ret_list[7:]  # the note is included
-            if type(ret[-1]) is str:
-                ret[-1] = ret[-1].rstrip()
-        return ret
+    def close(self) -> None:
+        self.pool.close()
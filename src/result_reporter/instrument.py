@@ -0,0 +1,147 @@
+#! python3
+
+
+from contextlib import AbstractContextManager, nullcontext
+import json
+import os
+from threading import Lock
+from time import perf_counter
+from typing import Callable
+
+
+INSTRUMENT_ENABLE_VARIABLE: str = 'RESULT_REPORTER_INSTRUMENT'
+
+# Called with ('timer', name, seconds) when a timer stops and ('counter', name, amount) on every count
+InstrumentationHook = Callable[[str, str, float], None]
+
+
+class Timing:
+    def __init__(self):
+        self.calls: int = 0
+        self.total: float = 0.0
+        self.maximum: float = 0.0
+
+    def add(self, seconds: float) -> None:
+        self.calls += 1
+        self.total += seconds
+        if seconds > self.maximum:
+            self.maximum = seconds
+
+    def __str__(self):
+        ret = ''
+        for k, v in vars(self).items():
+            ret += f'{k}={v}, '
+        return f'Timing({ret[:-2]})'
+
+    def __repr__(self):
+        ret = ''
+        for k, v in vars(self).items():
+            ret += f'{k}={v}, '
+        return f'Timing({ret[:-2]})'
+
+
+class StageTimer:
+    def __init__(self, instrumentation: 'Instrumentation', name: str):
+        self.instrumentation: Instrumentation = instrumentation
+        self.name: str = name
+        self.start: float = 0.0
+
+    def __enter__(self) -> 'StageTimer':
+        self.start = perf_counter()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.instrumentation.add_time(self.name, perf_counter() - self.start)
+
+
+class Instrumentation:
+    '''
+    Named timers and counters for finding where a run spends its time.
+
+    Disabled, timer() hands back one shared no-op context manager and count() returns at
+    once, so the calls can stay in hot paths. Enabled, every timer keeps its calls, total and
+    maximum seconds and every counter its sum; get_summary and to_json report them and each
+    hook is called as they change.
+    '''
+    def __init__(self, enabled: bool = False):
+        self.enabled: bool = enabled
+        self.timings: dict[str, Timing] = {}
+        self.counters: dict[str, float] = {}
+        self.hooks: list[InstrumentationHook] = []
+        self.lock: Lock = Lock()
+        self.null_timer: AbstractContextManager = nullcontext()
+
+    def timer(self, name: str) -> AbstractContextManager:
+        if not self.enabled:
+            return self.null_timer
+        return StageTimer(self, name)
+
+    def add_time(self, name: str, seconds: float) -> None:
+        with self.lock:
+            timing: Timing | None = self.timings.get(name)
+            if timing is None:
+                timing = self.timings[name] = Timing()
+            timing.add(seconds)
+        for hook in self.hooks:
+            hook('timer', name, seconds)
+
+    def count(self, name: str, amount: float = 1) -> None:
+        if not self.enabled:
+            return
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+        for hook in self.hooks:
+            hook('counter', name, amount)
+
+    def add_hook(self, hook: InstrumentationHook) -> None:
+        self.hooks.append(hook)
+
+    def remove_hook(self, hook: InstrumentationHook) -> None:
+        self.hooks.remove(hook)
+
+    def reset(self) -> None:
+        with self.lock:
+            self.timings.clear()
+            self.counters.clear()
+
+    def get_summary(self) -> dict[str, dict]:
+        with self.lock:
+            return {
+                'timers': {
+                    name: {'calls': timing.calls, 'total': timing.total, 'maximum': timing.maximum,
+                           'mean': timing.total / timing.calls}
+                    for name, timing in sorted(self.timings.items())
+                },
+                'counters': dict(sorted(self.counters.items())),
+            }
+
+    def to_json(self, path: str | None = None) -> str:
+        '''
+        The summary as JSON, also written to path if one is given.
+        '''
+        summary: str = json.dumps(self.get_summary(), indent=2)
+        if path is not None:
+            with open(path, 'w') as summary_file:
+                summary_file.write(summary)
+        return summary
+
+
+# The instrumentation the package reports to; set RESULT_REPORTER_INSTRUMENT or call enable() to turn it on
+INSTRUMENTATION: Instrumentation = Instrumentation(enabled=bool(os.environ.get(INSTRUMENT_ENABLE_VARIABLE)))
+
+
+def timer(name: str) -> AbstractContextManager:
+    return INSTRUMENTATION.timer(name)
+
+
+def count(name: str, amount: float = 1) -> None:
+    if INSTRUMENTATION.enabled:
+        INSTRUMENTATION.count(name, amount)
+
+
+def enable() -> None:
+    INSTRUMENTATION.enabled = True
+
+
+def disable() -> None:
+    INSTRUMENTATION.enabled = False
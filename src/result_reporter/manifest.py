@@ -0,0 +1,156 @@
+#! python3
+
+
+from bisect import bisect_left, bisect_right
+from datetime import datetime
+import json
+import os
+import tempfile
+
+
+MANIFEST_VERSION: int = 1
+
+
+def split_chart_name(file_name: str) -> tuple[str, str] | None:
+    '''
+    The track code and race date (YYYYMMDD, or '' when the name carries none) of a chart file
+    name like CD20240501.txt, or None if the name does not start with a track code and a digit.
+    '''
+    end: int = 0
+    while end < len(file_name) and not file_name[end].isdigit():
+        end += 1
+    if end == 0 or end == len(file_name):
+        return None
+    digits: str = file_name[end:end + 8]
+    race_date: str = ''
+    if len(digits) == 8 and digits.isdigit():
+        try:
+            datetime.strptime(digits, '%Y%m%d')
+            race_date = digits
+        except ValueError:
+            pass
+    return file_name[:end], race_date
+
+
+class ManifestDirectory:
+    def __init__(self, mtime_ns: int, files: list[tuple[str, str, str]]):
+        self.mtime_ns: int = mtime_ns
+        self.files: list[tuple[str, str, str]] = files  # (track code, race date, file name)
+
+    def __str__(self):
+        return f'ManifestDirectory(mtime_ns={self.mtime_ns}, files={len(self.files)})'
+
+    def __repr__(self):
+        return f'ManifestDirectory(mtime_ns={self.mtime_ns}, files={len(self.files)})'
+
+
+class ChartManifest:
+    '''
+    Index of the chart files under a chart archive (one directory per day, as get_chart_paths
+    reads it), by track code and by the race date in the file name.
+
+    refresh rescans only the date directories whose mtime changed since the last refresh (a
+    file added, removed or renamed changes it), so keeping the index current costs one
+    os.scandir of the archive root. Given a path, the index is saved there as JSON and loaded
+    again by the next ChartManifest, so a new process does not rescan unchanged directories
+    either.
+    '''
+    def __init__(self, root: str, path: str | None = None):
+        self.root: str = root
+        self.path: str | None = path
+        self.directories: dict[str, ManifestDirectory] = {}
+        self.tracks: dict[str, list[tuple[str, str]]] = {}  # track code -> sorted (race date, path)
+        if path is not None:
+            self.load()
+
+    def load(self) -> None:
+        try:
+            with open(self.path) as manifest_file:  # type: ignore
+                data: dict = json.load(manifest_file)
+        except (OSError, ValueError):
+            return
+        if data.get('version') != MANIFEST_VERSION or data.get('root') != os.path.abspath(self.root):
+            return
+        self.directories = {
+            name: ManifestDirectory(entry['mtime_ns'], [tuple(file) for file in entry['files']])  # type: ignore
+            for name, entry in data['directories'].items()
+        }
+        self.build_index()
+
+    def save(self) -> None:
+        if self.path is None:
+            return
+        data: dict = {
+            'version': MANIFEST_VERSION,
+            'root': os.path.abspath(self.root),
+            'directories': {
+                name: {'mtime_ns': directory.mtime_ns, 'files': directory.files}
+                for name, directory in self.directories.items()
+            },
+        }
+        directory_path: str = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory_path, exist_ok=True)
+        descriptor, temp_path = tempfile.mkstemp(dir=directory_path, suffix='.tmp')
+        with os.fdopen(descriptor, 'w') as manifest_file:
+            json.dump(data, manifest_file)
+        os.replace(temp_path, self.path)
+
+    def scan_directory(self, path: str, mtime_ns: int) -> ManifestDirectory:
+        files: list[tuple[str, str, str]] = []
+        with os.scandir(path) as entries:
+            for entry in entries:
+                parts: tuple[str, str] | None = split_chart_name(entry.name)
+                if parts is not None:
+                    files.append((parts[0], parts[1], entry.name))
+        return ManifestDirectory(mtime_ns, files)
+
+    def refresh(self) -> bool:
+        '''
+        Bring the index up to date with the archive; returns whether anything changed.
+        '''
+        changed: bool = False
+        seen: set[str] = set()
+        with os.scandir(self.root) as entries:
+            for entry in entries:
+                if not entry.is_dir():
+                    continue
+                seen.add(entry.name)
+                mtime_ns: int = entry.stat().st_mtime_ns
+                directory: ManifestDirectory | None = self.directories.get(entry.name)
+                if directory is None or directory.mtime_ns != mtime_ns:
+                    self.directories[entry.name] = self.scan_directory(entry.path, mtime_ns)
+                    changed = True
+        for name in [name for name in self.directories if name not in seen]:
+            del self.directories[name]
+            changed = True
+        if changed or not self.tracks:
+            self.build_index()
+        if changed:
+            self.save()
+        return changed
+
+    def build_index(self) -> None:
+        tracks: dict[str, list[tuple[str, str]]] = {}
+        for name, directory in self.directories.items():
+            for track_code, race_date, file_name in directory.files:
+                tracks.setdefault(track_code, []).append((race_date, os.path.join(self.root, name, file_name)))
+        for chart_files in tracks.values():
+            chart_files.sort()
+        self.tracks = tracks
+
+    def get_track_codes(self) -> list[str]:
+        return sorted(self.tracks)
+
+    def find(self, track_code: str, start: str | None = None, end: str | None = None) -> list[str]:
+        '''
+        Paths of the charts of track_code raced from start to end inclusive (YYYYMMDD, either
+        may be omitted), in race date order. Files whose name carries no date are only
+        returned when no range is given.
+        '''
+        chart_files: list[tuple[str, str]] = self.tracks.get(track_code, [])
+        if start is None and end is None:
+            return [path for __, path in chart_files]
+        low: int = bisect_left(chart_files, (start or '00000000', ''))
+        # end + '\x00' sorts after every file of end and before the next date
+        high: int = bisect_right(chart_files, ((end or '99999999') + '\x00', ''))
+        return [path for race_date, path in chart_files[low:high] if race_date]
@@ -0,0 +1,276 @@
+#! python3
+
+
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+import io
+import os
+from queue import Empty, Full, Queue
+from threading import Event, Thread
+from time import perf_counter
+from typing import Any, Callable, Iterable
+
+from .chart import Chart
+from .storage import DEFAULT_BATCH_SIZE, StorageBackend
+from .utils import (WINNERS_ONLY, ChartAggregate, ChartFailure, ChartFilter, build_chart, get_chart_paths,
+                    get_daily_record_values)
+
+
+DEFAULT_QUEUE_SIZE: int = 64
+QUEUE_POLL_INTERVAL: float = 0.1
+
+
+class StageStats:
+    '''
+    What one pipeline stage did: items it produced, seconds spent working, seconds blocked
+    waiting for input (starved) and seconds blocked handing output to a full queue (back
+    pressure from the next stage).
+    '''
+    def __init__(self, name: str):
+        self.name: str = name
+        self.items: int = 0
+        self.busy: float = 0.0
+        self.starved: float = 0.0
+        self.blocked: float = 0.0
+        self.elapsed: float = 0.0
+
+    def get_throughput(self) -> float:
+        '''
+        Items per second of wall time.
+        '''
+        return self.items / self.elapsed if self.elapsed else 0.0
+
+    def __str__(self):
+        return f'StageStats(name={self.name}, items={self.items}, busy={self.busy:.3f}, ' \
+               f'starved={self.starved:.3f}, blocked={self.blocked:.3f}, elapsed={self.elapsed:.3f}, ' \
+               f'throughput={self.get_throughput():.1f}/s)'
+
+    def __repr__(self):
+        return self.__str__()
+
+
+class PipelineResult:
+    def __init__(self, stages: list[StageStats], failures: list[ChartFailure], duplicates: list[str],
+                 records: int, elapsed: float):
+        self.stages: list[StageStats] = stages
+        self.failures: list[ChartFailure] = failures
+        self.duplicates: list[str] = duplicates
+        self.records: int = records
+        self.elapsed: float = elapsed
+
+    def __str__(self):
+        ret = ''
+        for k, v in vars(self).items():
+            ret += f'{k}={v}, '
+        return f'PipelineResult({ret[:-2]})'
+
+    def __repr__(self):
+        ret = ''
+        for k, v in vars(self).items():
+            ret += f'{k}={v}, '
+        return f'PipelineResult({ret[:-2]})'
+
+
+class PipelineStopped(Exception):
+    pass
+
+
+def _parse_chart_text(path: str, text: str, finish_positions: Iterable[int] | None,
+                      chart_filter: ChartFilter | None = None) -> tuple[str, Chart | None, str | None]:
+    try:
+        return path, build_chart(io.StringIO(text), finish_positions, chart_filter), None
+    except Exception as e:
+        return path, None, f'{type(e).__name__}: {e}'
+
+
+class ChartPipeline:
+    '''
+    Loads the charts of a track into a results table with every stage running at once:
+
+        reader -> parse -> aggregate -> writer
+
+    The reader thread reads chart files from disk, the parse stage builds Charts (in a pool
+    of worker processes when workers > 1), the aggregate stage turns each into the
+    add_record values of its day, and the writer thread inserts them with add_records,
+    batch_size at a time. Stages are joined by queues of at most queue_size items, so a slow
+    stage holds the ones before it back instead of letting work pile up in memory. If any
+    stage fails the others stop and the error is raised from run.
+
+    surfaces are the course codes of the table, in column order. Given a chart_filter, only
+    the charts it wants are loaded; files it rejects by name are not even read.
+    '''
+    def __init__(self, backend: StorageBackend, table_name: str, surfaces: list[str], workers: int | None = None,
+                 queue_size: int = DEFAULT_QUEUE_SIZE, batch_size: int = DEFAULT_BATCH_SIZE,
+                 finish_positions: Iterable[int] | None = WINNERS_ONLY):
+        if workers is None:
+            workers = os.cpu_count() or 1
+        if workers < 1:
+            raise ValueError(f'workers must be at least 1, got {workers}')
+        if queue_size < 1:
+            raise ValueError(f'queue_size must be at least 1, got {queue_size}')
+        self.backend: StorageBackend = backend
+        self.table_name: str = table_name
+        self.surfaces: list[str] = surfaces
+        self.workers: int = workers
+        self.queue_size: int = queue_size
+        self.batch_size: int = batch_size
+        self.finish_positions: frozenset[int] | None = \
+            None if finish_positions is None else frozenset(finish_positions)
+
+    def run(self, charts_path: str, track_code: str, chart_filter: ChartFilter | None = None) -> PipelineResult:
+        return self.run_paths(get_chart_paths(charts_path, track_code), chart_filter)
+
+    def run_paths(self, chart_paths: list[str], chart_filter: ChartFilter | None = None) -> PipelineResult:
+        if chart_filter is not None:
+            chart_paths = [chart_path for chart_path in chart_paths if chart_filter.wants_path(chart_path)]
+        stop: Event = Event()
+        errors: list[BaseException] = []
+        failures: list[ChartFailure] = []
+        duplicates: list[str] = []
+        read_queue: Queue = Queue(self.queue_size)
+        parse_queue: Queue = Queue(self.queue_size)
+        record_queue: Queue = Queue(self.queue_size)
+        stats: dict[str, StageStats] = {name: StageStats(name) for name in ('read', 'parse', 'aggregate', 'write')}
+
+        def put(queue: Queue, item: Any, stage: StageStats) -> None:
+            start: float = perf_counter()
+            while True:
+                if stop.is_set():
+                    raise PipelineStopped()
+                try:
+                    queue.put(item, timeout=QUEUE_POLL_INTERVAL)
+                    break
+                except Full:
+                    pass
+            stage.blocked += perf_counter() - start
+
+        def get(queue: Queue, stage: StageStats) -> Any:
+            start: float = perf_counter()
+            while True:
+                if stop.is_set():
+                    raise PipelineStopped()
+                try:
+                    item: Any = queue.get(timeout=QUEUE_POLL_INTERVAL)
+                    break
+                except Empty:
+                    pass
+            stage.starved += perf_counter() - start
+            return item
+
+        def read() -> None:
+            stage: StageStats = stats['read']
+            for chart_path in chart_paths:
+                start: float = perf_counter()
+                try:
+                    with open(chart_path) as chart_file:
+                        item: tuple[str, str | None, str | None] = (chart_path, chart_file.read(), None)
+                except OSError as e:
+                    item = (chart_path, None, f'{type(e).__name__}: {e}')
+                stage.busy += perf_counter() - start
+                stage.items += 1
+                put(read_queue, item, stage)
+            put(read_queue, None, stage)
+
+        def parse() -> None:
+            stage: StageStats = stats['parse']
+
+            def forward(path: str, chart: Chart | None, error: str | None) -> None:
+                if error is not None:
+                    failures.append(ChartFailure(path, error))
+                elif chart:
+                    stage.items += 1
+                    put(parse_queue, chart, stage)
+
+            def forward_pending(path: str, future: Future | None, error: str | None) -> None:
+                if future is None:
+                    forward(path, None, error)
+                    return
+                start: float = perf_counter()
+                path, chart, error = future.result()
+                stage.busy += perf_counter() - start
+                forward(path, chart, error)
+
+            if self.workers == 1:
+                while (item := get(read_queue, stage)) is not None:
+                    path, text, error = item
+                    if text is None:
+                        forward(path, None, error)
+                        continue
+                    start: float = perf_counter()
+                    path, chart, error = _parse_chart_text(path, text, self.finish_positions, chart_filter)
+                    stage.busy += perf_counter() - start
+                    forward(path, chart, error)
+            else:
+                # At most two files per worker in flight; results are forwarded in file order
+                pending: deque[tuple[str, Future | None, str | None]] = deque()
+                with ProcessPoolExecutor(max_workers=self.workers) as executor:
+                    try:
+                        while (item := get(read_queue, stage)) is not None:
+                            path, text, error = item
+                            future: Future | None = None
+                            if text is not None:
+                                future = executor.submit(_parse_chart_text, path, text, self.finish_positions,
+                                                         chart_filter)
+                            pending.append((path, future, error))
+                            while len(pending) >= 2 * self.workers:
+                                forward_pending(*pending.popleft())
+                        while pending:
+                            forward_pending(*pending.popleft())
+                    finally:
+                        for __, future, __ in pending:
+                            if future is not None:
+                                future.cancel()
+            put(parse_queue, None, stage)
+
+        def aggregate() -> None:
+            stage: StageStats = stats['aggregate']
+            while (chart := get(parse_queue, stage)) is not None:
+                start: float = perf_counter()
+                values: list = get_daily_record_values(ChartAggregate(chart, brohamer=False), self.surfaces)
+                stage.busy += perf_counter() - start
+                stage.items += 1
+                put(record_queue, values, stage)
+            put(record_queue, None, stage)
+
+        def write() -> None:
+            stage: StageStats = stats['write']
+            batch: list[list] = []
+            while True:
+                values: list | None = get(record_queue, stage)
+                if values is not None:
+                    batch.append(values)
+                if batch and (values is None or len(batch) >= self.batch_size):
+                    start: float = perf_counter()
+                    duplicates.extend(self.backend.add_records(self.table_name, batch, self.batch_size))
+                    stage.busy += perf_counter() - start
+                    stage.items += len(batch)
+                    batch = []
+                if values is None:
+                    break
+
+        def run_stage(stage: StageStats, target: Callable[[], None]) -> None:
+            start: float = perf_counter()
+            try:
+                target()
+            except PipelineStopped:
+                pass
+            except BaseException as e:
+                errors.append(e)
+                stop.set()
+            finally:
+                stage.elapsed = perf_counter() - start
+
+        start: float = perf_counter()
+        threads: list[Thread] = [
+            Thread(target=run_stage, args=(stats[name], target), name=f'pipeline-{name}', daemon=True)
+            for name, target in (('read', read), ('parse', parse), ('aggregate', aggregate), ('write', write))
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        if errors:
+            raise errors[0]
+        return PipelineResult(list(stats.values()), failures, duplicates, stats['write'].items,
+                              perf_counter() - start)
+
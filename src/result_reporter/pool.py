@@ -0,0 +1,153 @@
+#! python3
+
+
+from contextlib import contextmanager
+from threading import Condition
+from time import monotonic
+from typing import Any, Callable, Iterator
+
+from mssql_python import connect
+from mssql_python.exceptions import InterfaceError, OperationalError
+
+from .storage import StorageSession, T
+
+
+DEFAULT_POOL_SIZE: int = 4
+DEFAULT_POOL_TIMEOUT: float = 30.0
+DEFAULT_HEALTH_CHECK_INTERVAL: float = 60.0
+
+
+class PooledConnection(StorageSession):
+    '''
+    A pooled connection and the one cursor kept open on it, so the fixed INSERT and SELECT
+    statements keep hitting the same prepared handle instead of a fresh cursor per call.
+    '''
+    def __init__(self, connection: Any):
+        super().__init__(connection)
+        self.last_used: float = monotonic()
+
+    def is_healthy(self) -> bool:
+        try:
+            self.cursor.execute('SELECT 1;')
+            self.cursor.fetchall()
+            return True
+        except Exception:
+            return False
+
+
+class ConnectionPool:
+    '''
+    A bounded, thread safe pool of SQL Server connections.
+
+    At most max_size connections are open at once; a thread asking for one while all are in
+    use waits up to timeout seconds. A connection that sat idle longer than
+    health_check_interval is checked with SELECT 1 before it is handed out and replaced if it
+    is dead, and one that fails with a connection level error is thrown away rather than
+    returned to the pool.
+    '''
+    def __init__(self, sql_connection_string: str, max_size: int = DEFAULT_POOL_SIZE,
+                 timeout: float = DEFAULT_POOL_TIMEOUT, health_check_interval: float = DEFAULT_HEALTH_CHECK_INTERVAL):
+        if max_size < 1:
+            raise ValueError(f'max_size must be at least 1, got {max_size}')
+        self.sql_connection_string: str = sql_connection_string
+        self.max_size: int = max_size
+        self.timeout: float = timeout
+        self.health_check_interval: float = health_check_interval
+        self.idle: list[PooledConnection] = []  # most recently released last
+        self.size: int = 0
+        # Guards idle and size; waiters are woken whenever a connection is released or a slot freed
+        self.condition: Condition = Condition()
+
+    def open_connection(self) -> PooledConnection:
+        return PooledConnection(connect(self.sql_connection_string))
+
+    def acquire(self, fresh: bool = False) -> PooledConnection:
+        '''
+        A connection from the pool, waiting up to timeout seconds for one. fresh=True always
+        opens a new connection, closing the longest idle one if the pool is full.
+        '''
+        deadline: float = monotonic() + self.timeout
+        while True:
+            pooled: PooledConnection | None = None
+            stale: PooledConnection | None = None
+            with self.condition:
+                while True:
+                    if self.idle and not fresh:
+                        pooled = self.idle.pop()
+                        break
+                    if self.size < self.max_size:
+                        self.size += 1
+                        break
+                    if self.idle:
+                        stale = self.idle.pop(0)  # its slot goes to the new connection
+                        break
+                    remaining: float = deadline - monotonic()
+                    if remaining <= 0:
+                        raise TimeoutError(f'no database connection became free within {self.timeout} seconds')
+                    self.condition.wait(remaining)
+            if pooled is None:
+                if stale is not None:
+                    stale.close()
+                try:
+                    return self.open_connection()
+                except Exception:
+                    self.free_slot()
+                    raise
+            if monotonic() - pooled.last_used < self.health_check_interval or pooled.is_healthy():
+                return pooled
+            self.discard(pooled)
+
+    def release(self, pooled: PooledConnection) -> None:
+        pooled.last_used = monotonic()
+        with self.condition:
+            self.idle.append(pooled)
+            self.condition.notify()
+
+    def free_slot(self) -> None:
+        with self.condition:
+            self.size -= 1
+            self.condition.notify()
+
+    def discard(self, pooled: PooledConnection) -> None:
+        pooled.close()
+        self.free_slot()
+
+    @contextmanager
+    def connection(self, fresh: bool = False) -> Iterator[PooledConnection]:
+        pooled: PooledConnection = self.acquire(fresh)
+        try:
+            yield pooled
+        except (OperationalError, InterfaceError):
+            self.discard(pooled)
+            raise
+        except BaseException:
+            try:
+                pooled.rollback()
+            except Exception:
+                self.discard(pooled)
+                raise
+            self.release(pooled)
+            raise
+        else:
+            self.release(pooled)
+
+    def run(self, operation: Callable[[PooledConnection], T]) -> T:
+        '''
+        Run operation on a pooled connection. If the connection turns out to be broken, the
+        operation is retried once on a newly opened one (the other idle connections may have
+        gone down with it); operations must commit only at their end so that a retry never
+        repeats committed work.
+        '''
+        try:
+            with self.connection() as pooled:
+                return operation(pooled)
+        except (OperationalError, InterfaceError):
+            with self.connection(fresh=True) as pooled:
+                return operation(pooled)
+
+    def close(self) -> None:
+        with self.condition:
+            idle: list[PooledConnection] = self.idle
+            self.idle = []
+        for pooled in idle:
+            self.discard(pooled)
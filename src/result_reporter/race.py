@@ -5,18 +5,15 @@ from pydrf.textchart import RaceData, StarterPerformanceData
 
 
 class Race:
+    __slots__ = ('data', 'starters')
+
     def __init__(self, data: RaceData, starters: list[StarterPerformanceData]):
         self.data: RaceData = data
         self.starters: list[StarterPerformanceData] = starters
 
     def __str__(self):
-        ret = ''
-        for k, v in vars(self).items():
-            ret += f'{k}={v}, '
-        return f'Race({ret[:-2]})'
+        fields: str = ', '.join([f'{k}={getattr(self, k)}' for k in self.__slots__])
+        return f'Race({fields})'
 
     def __repr__(self):
-        ret = ''
-        for k, v in vars(self).items():
-            ret += f'{k}={v}, '
-        return f'Race({ret[:-2]})'
+        return self.__str__()
@@ -0,0 +1,151 @@
+#! python3
+
+
+from collections import OrderedDict
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+import json
+import os
+import sqlite3
+from threading import Lock
+import time
+from typing import Iterable
+
+from .coursetype import CourseType
+from .racetype import RaceType
+
+
+DEFAULT_MAXIMUM_RECORD_ENTRIES: int = 4096
+DEFAULT_RECENT_DAYS: int = 7
+DEFAULT_RECENT_RECORD_TTL: float = 300.0
+
+
+RecordKey = tuple[str, str, str, int]
+
+
+class RecordCache:
+    '''
+    Read-through cache of ResultDatabaseManager.get_record results.
+
+    Entries live in memory, least recently used first out once there are more than
+    maximum_entries, and, given a path, in a local SQLite file as well so that later runs start
+    warm. Records of dates more than recent_days old are taken to be final and kept until they
+    are invalidated; more recent ones, including dates with no record yet, expire after ttl
+    seconds. ResultDatabaseManager invalidates the dates it writes.
+    '''
+    def __init__(self, maximum_entries: int = DEFAULT_MAXIMUM_RECORD_ENTRIES, recent_days: int = DEFAULT_RECENT_DAYS,
+                 ttl: float = DEFAULT_RECENT_RECORD_TTL, path: str | None = None):
+        self.maximum_entries: int = maximum_entries
+        self.recent_days: int = recent_days
+        self.ttl: float = ttl
+        self.path: str | None = path
+        self.entries: OrderedDict[RecordKey, tuple[list[float | str], float]] = OrderedDict()
+        self.lock: Lock = Lock()
+        self.database: sqlite3.Connection | None = None
+        if path is not None:
+            directory: str = os.path.dirname(os.path.abspath(path))
+            os.makedirs(directory, exist_ok=True)
+            self.database = sqlite3.connect(path, check_same_thread=False)
+            self.database.execute('CREATE TABLE IF NOT EXISTS records (TABLE_NAME TEXT, RACE_DATE TEXT, COURSE TEXT, '
+                                  'RACE_TYPE INTEGER, RECORD TEXT, STORED_AT REAL, '
+                                  'PRIMARY KEY (TABLE_NAME, RACE_DATE, COURSE, RACE_TYPE));')
+            self.database.commit()
+
+    @staticmethod
+    def get_key(table_name: str, race_date: str, course: CourseType, race_type: RaceType) -> RecordKey:
+        return table_name, f'{race_date}'.replace('-', ''), course.course_to_str(), race_type.value
+
+    def is_final(self, race_date: str, record: list[float | str]) -> bool:
+        if not record:
+            return False
+        try:
+            day: date = datetime.strptime(race_date, '%Y%m%d').date()
+        except ValueError:
+            return False
+        return day < date.today() - timedelta(days=self.recent_days)
+
+    def is_fresh(self, key: RecordKey, record: list[float | str], stored_at: float) -> bool:
+        return self.is_final(key[1], record) or time.time() - stored_at < self.ttl
+
+    def get(self, key: RecordKey) -> list[float | str] | None:
+        with self.lock:
+            entry: tuple[list[float | str], float] | None = self.entries.get(key)
+            if entry is None and self.database is not None:
+                row = self.database.execute('SELECT RECORD, STORED_AT FROM records WHERE TABLE_NAME = ? AND '
+                                            'RACE_DATE = ? AND COURSE = ? AND RACE_TYPE = ?;', key).fetchone()
+                if row is not None:
+                    entry = (json.loads(row[0]), row[1])
+                    self.remember(key, entry)
+            if entry is None:
+                return None
+            if not self.is_fresh(key, *entry):
+                self.forget(key)
+                return None
+            self.entries.move_to_end(key)
+            return list(entry[0])
+
+    @staticmethod
+    def to_record_value(value: object) -> object:
+        '''
+        A JSON-storable form of a value of a fetched record: driver Decimals become floats and
+        dates ISO strings, so cached and stored records read back the same.
+        '''
+        if isinstance(value, Decimal):
+            return float(value)
+        if isinstance(value, (date, datetime)):
+            return value.isoformat()
+        return value
+
+    def put(self, key: RecordKey, record: list[float | str]) -> list[float | str]:
+        '''
+        Cache record under key and return it as get will: with to_record_value applied.
+        '''
+        entry: tuple[list[float | str], float] = ([self.to_record_value(v) for v in record], time.time())
+        with self.lock:
+            self.remember(key, entry)
+            if self.database is not None:
+                self.database.execute('INSERT OR REPLACE INTO records VALUES (?, ?, ?, ?, ?, ?);',
+                                      (*key, json.dumps(entry[0]), entry[1]))
+                self.database.commit()
+        return list(entry[0])
+
+    def remember(self, key: RecordKey, entry: tuple[list[float | str], float]) -> None:
+        self.entries[key] = entry
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.maximum_entries:
+            self.entries.popitem(last=False)
+
+    def forget(self, key: RecordKey) -> None:
+        self.entries.pop(key, None)
+        if self.database is not None:
+            self.database.execute('DELETE FROM records WHERE TABLE_NAME = ? AND RACE_DATE = ? AND COURSE = ? AND '
+                                  'RACE_TYPE = ?;', key)
+            self.database.commit()
+
+    def invalidate(self, table_name: str, race_dates: Iterable[str] | None = None) -> None:
+        '''
+        Drop the entries of the given dates of table_name, or of the whole table.
+        '''
+        dates: set[str] | None = None if race_dates is None else {f'{d}'.replace('-', '') for d in race_dates}
+        with self.lock:
+            for key in [key for key in self.entries if key[0] == table_name and (dates is None or key[1] in dates)]:
+                del self.entries[key]
+            if self.database is not None:
+                if dates is None:
+                    self.database.execute('DELETE FROM records WHERE TABLE_NAME = ?;', (table_name,))
+                else:
+                    self.database.executemany('DELETE FROM records WHERE TABLE_NAME = ? AND RACE_DATE = ?;',
+                                              [(table_name, d) for d in dates])
+                self.database.commit()
+
+    def clear(self) -> None:
+        with self.lock:
+            self.entries.clear()
+            if self.database is not None:
+                self.database.execute('DELETE FROM records;')
+                self.database.commit()
+
+    def close(self) -> None:
+        if self.database is not None:
+            self.database.close()
+            self.database = None
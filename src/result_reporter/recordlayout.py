@@ -0,0 +1,68 @@
+#! python3
+
+
+from functools import cache
+from typing import Iterable
+
+from pydrf.textchart import RecordType, StarterPerformanceData
+
+
+# Every column of the probe record holds its own position plus PROBE_OFFSET
+PROBE_OFFSET: int = 1000
+PROBE_COLUMNS: int = 512
+
+
+def get_probe_line(record_type: str) -> list[str]:
+    return [record_type] + [str(PROBE_OFFSET + i) for i in range(1, PROBE_COLUMNS)]
+
+
+def find_field_columns(record_class: type, record_type: str, names: Iterable[str]) -> dict[str, int | None]:
+    '''
+    The column of a DRF text chart record that pydrf copies each attribute in names from.
+
+    record_class.create is handed a record whose every column holds its position plus
+    PROBE_OFFSET, so an attribute read verbatim from a column comes back as that column's
+    marker. An attribute pydrf derives some other way (or a record it cannot build from the
+    markers) maps to None.
+    '''
+    line: list[str] = get_probe_line(record_type)
+    columns: dict[str, int | None] = {name: None for name in names}
+    try:
+        record: object = record_class.create(line)
+    except Exception:
+        return columns
+    for name in columns:
+        try:
+            position: float = float(getattr(record, name)) - PROBE_OFFSET
+        except (AttributeError, TypeError, ValueError):
+            continue
+        if position >= 1 and position == int(position):
+            columns[name] = int(position)
+    return columns
+
+
+def find_record_length(record_class: type, record_type: str, minimum: int = 1) -> int:
+    '''
+    The fewest columns (at least minimum) a record needs for record_class.create to build it.
+    '''
+    line: list[str] = get_probe_line(record_type)
+    for length in range(minimum, PROBE_COLUMNS):
+        try:
+            record_class.create(line[:length])
+            return length
+        except Exception:
+            continue
+    return PROBE_COLUMNS
+
+
+@cache
+def get_official_finish_column() -> int | None:
+    '''
+    The starter record column pydrf reads official_finish from, or None if it does not copy one verbatim.
+    '''
+    column: int | None = \
+        find_field_columns(StarterPerformanceData, RecordType.STARTER.value, ['official_finish'])['official_finish']
+    if column is None:
+        print('[official_finish]: could not find the starter record column of the official finish; '
+              'every starter will be built and filtered after')
+    return column
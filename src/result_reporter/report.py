@@ -14,10 +14,14 @@ def get_time_of_beaten_lengths(distance: float, final_time: float) -> float:
 
 
 class Report(ABC):
-    pass
+    # Reports are made for every race of every chart, so none of them carries a __dict__
+    __slots__ = ()
 
 
 class ShakeUpReport(Report):
+    __slots__ = ('key', 'cls', 'claiming_price', 'purse', 'surface', 'post_position', 'distance',
+                 'bl1', 'bl2', 'bl3', 'blf', 'fr1', 'fr2', 'fr3', 'finish')
+
     def __init__(self, key: str, cls: str, claiming_price: float, purse: float,
                  surface: str, distance: float, post_position: int,
                  bl1: float, bl2: float, bl3: float, blf: float,
@@ -34,27 +38,24 @@ class ShakeUpReport(Report):
         self.bl2: float = bl2 / 100
         self.bl3: float = bl3 / 100
         self.blf: float = blf / 100
-        self.fr1: float = floor((fr1 + get_time_of_beaten_lengths(self.distance, finish) * self.bl1) * 10) / 10
-        self.fr2: float = floor((fr2 + get_time_of_beaten_lengths(self.distance, finish) * self.bl2) * 10) / 10
+        time_of_beaten_length: float = get_time_of_beaten_lengths(self.distance, finish)
+        self.fr1: float = floor((fr1 + time_of_beaten_length * self.bl1) * 10) / 10
+        self.fr2: float = floor((fr2 + time_of_beaten_length * self.bl2) * 10) / 10
+        adjusted_finish: float = floor((finish + time_of_beaten_length * self.blf) * 10) / 10
         if self.distance > 6:
-            self.fr3: float = floor((fr3 + get_time_of_beaten_lengths(self.distance, finish) * self.bl3) * 10) / 10
+            self.fr3: float = floor((fr3 + time_of_beaten_length * self.bl3) * 10) / 10
         elif self.distance == 6:
-            self.fr3: float = floor((finish + get_time_of_beaten_lengths(self.distance, finish) * self.blf) * 10) / 10
+            self.fr3: float = adjusted_finish
         else:
             self.fr3: float = nan
-        self.finish: float = floor((finish + get_time_of_beaten_lengths(self.distance, finish) * self.blf) * 10) / 10
+        self.finish: float = adjusted_finish
 
     def __str__(self):
-        ret = ''
-        for k, v in vars(self).items():
-            ret += f'{k}={v}, '
-        return f'ShakeUpReport({ret[:-2]})'
+        fields: str = ', '.join([f'{k}={getattr(self, k)}' for k in self.__slots__])
+        return f'ShakeUpReport({fields})'
 
     def __repr__(self):
-        ret = ''
-        for k, v in vars(self).items():
-            ret += f'{k}={v}, '
-        return f'ShakeUpReport({ret[:-2]})'
+        return self.__str__()
 
 
 class DailyShakeUpReport:
@@ -65,6 +66,10 @@ class DailyShakeUpReport:
 
 
 class BrohamerReport(Report):
+    __slots__ = ('key', 'cls', 'sex', 'age', 'claiming_price', 'purse', 'race', 'surface', 'course', 'distance',
+                 'number', 'post', 'bl1', 'bl2', 'c1', 'c2', 'fc', 'fr1', 'fr2', 'fr3', 'ep', 'sp', 'ap', 'fx',
+                 'energy', 'comment')
+
     def __init__(self, key: str, cls: str, sex: str, age: str, claiming_price: float, purse: float, race: int,
                  surface: str, course: str, distance: float, number: int, post: int,
                  bl1: float, bl2: float, c1: float, c2: float, fc: float, comment=None):
@@ -138,16 +143,11 @@ class BrohamerReport(Report):
         self.comment = comment
 
     def __str__(self):
-        ret = ''
-        for k, v in vars(self).items():
-            ret += f'{k}={v}, '
-        return f'BrohamerReport({ret[:-2]})'
+        fields: str = ', '.join([f'{k}={getattr(self, k)}' for k in self.__slots__])
+        return f'BrohamerReport({fields})'
 
     def __repr__(self):
-        ret = ''
-        for k, v in vars(self).items():
-            ret += f'{k}={v}, '
-        return f'BrohamerReport({ret[:-2]})'
+        return self.__str__()
 
 
 class DailyBrohamerReport:
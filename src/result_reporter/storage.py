@@ -0,0 +1,625 @@
+#! python3
+
+
+from abc import ABC, abstractmethod
+from math import nan
+import sqlite3
+from threading import RLock
+from typing import Any, Callable, TypeVar
+
+import pandas as pd
+
+from .coursetype import CourseType
+from .instrument import count, timer
+from .racetype import RaceType
+from .recordcache import RecordCache, RecordKey
+
+
+DEFAULT_BATCH_SIZE: int = 500
+MAXIMUM_SQLITE_PARAMETERS: int = 999  # the lowest limit SQLite may have been compiled with
+
+# The seven columns every course has per race type in the wide layout, in table order
+RECORD_STATS: tuple[str, ...] = ('MIN_FR1', 'MAX_FR1', 'MIN_FR2', 'MAX_FR2', 'MIN_FR3', 'MAX_FR3', 'COMMENT')
+# Every course with a name of its own; the rest are stored as dirt, as course_to_str does
+WIDE_TABLE_COURSES: tuple[CourseType, ...] = (
+    CourseType.DIRT, CourseType.TURF, CourseType.INNER_TURF, CourseType.OUTER_TURF, CourseType.DOWNHILL_TURF,
+    CourseType.ALL_WEATHER_TRACK, CourseType.INNER_TRACK, CourseType.HURDLE
+)
+
+# DATE, COURSE, RACE_TYPE, STAT, VALUE, TEXT
+LongRow = tuple[str, int, int, str, float | None, str | None]
+
+T = TypeVar('T')
+
+
+def get_stored_course(course: CourseType) -> CourseType:
+    '''
+    The course a result of course is stored under, e.g. DIRT for DIRT_TRAINING.
+    '''
+    course_str: str = course.course_to_str()
+    for stored_course in WIDE_TABLE_COURSES:
+        if stored_course.course_to_str() == course_str:
+            return stored_course
+    return CourseType.DIRT
+
+
+class TableSchema:
+    '''
+    Cached metadata of one results table: its columns in ordinal order, the INSERT statement
+    for a full row, and the positions of the columns belonging to each course.
+    '''
+    def __init__(self, table_name: str, column_names: list[str]):
+        self.table_name: str = table_name
+        self.column_names: list[str] = column_names
+        self.ordinal_positions: dict[str, int] = {
+            column_name: i + 1 for i, column_name in enumerate(column_names)
+        }
+        self.insert_string: str = f'INSERT INTO {table_name} ({",".join(column_names)}) '\
+                                  f'VALUES ({",".join("?" * len(column_names))});'
+        self.column_owners: dict[int, CourseType] | None = None
+        self.course_indices: dict[str, list[int]] = {}
+        self.projections: dict[tuple[str, str, bool], str] = {}
+
+    def get_column_owners(self) -> dict[int, CourseType]:
+        '''
+        The course of every course column by position. A column belongs to the course with the
+        longest name it contains, so INNER_TURF columns are not taken for TURF ones.
+        '''
+        if self.column_owners is None:
+            self.column_owners = {}
+            for course in sorted(WIDE_TABLE_COURSES, key=lambda course: len(course.course_to_str())):
+                course_str: str = course.course_to_str().upper().replace(' ', '_')
+                for i, column_name in enumerate(self.column_names):
+                    if course_str in column_name:
+                        self.column_owners[i] = course
+        return self.column_owners
+
+    def get_course_indices(self, course: CourseType) -> list[int]:
+        '''
+        Positions of the columns belonging to the course the results of course are stored under.
+        '''
+        stored_course: CourseType = get_stored_course(course)
+        course_str: str = stored_course.course_to_str()
+        indices: list[int] | None = self.course_indices.get(course_str)
+        if indices is None:
+            owners: dict[int, CourseType] = self.get_column_owners()
+            indices = [i for i in sorted(owners) if owners[i] is stored_course]
+            self.course_indices[course_str] = indices
+        return indices
+
+    def get_course_slice(self, course: CourseType, race_type: RaceType) -> list[int]:
+        indices: list[int] = self.get_course_indices(course)
+        if race_type is RaceType.SPRINT:
+            return indices[:7]
+        elif race_type is RaceType.ROUTE:
+            return indices[7:]  # the note is included
+        return []
+
+    def get_course_columns(self, course: CourseType, race_type: RaceType) -> list[str]:
+        return [self.column_names[i] for i in self.get_course_slice(course, race_type)]
+
+    def get_projection_string(self, course: CourseType, race_type: RaceType, date_range: bool = False) -> str:
+        '''
+        SELECT of only the columns of course and race_type, for one DATE or, with date_range,
+        for DATE BETWEEN two dates (with DATE as the first column).
+        '''
+        key: tuple[str, str, bool] = (course.course_to_str(), race_type.value, date_range)
+        query_string: str | None = self.projections.get(key)
+        if query_string is None:
+            column_names: list[str] = self.get_course_columns(course, race_type)
+            if date_range:
+                query_string = f'SELECT DATE,{",".join(column_names)} FROM {self.table_name} '\
+                               f'WHERE DATE BETWEEN ? AND ? ORDER BY DATE;'
+            else:
+                query_string = f'SELECT {",".join(column_names)} FROM {self.table_name} WHERE DATE = ?;'
+            self.projections[key] = query_string
+        return query_string
+
+    def get_column_layout(self) -> list[tuple[int, CourseType, RaceType, str]]:
+        '''
+        The (position, course, race type, stat) of every course column, for moving wide rows to
+        the long layout; the columns of each course are those get_record reads.
+        '''
+        layout: list[tuple[int, CourseType, RaceType, str]] = []
+        for course in WIDE_TABLE_COURSES:
+            indices: list[int] = self.get_course_indices(course)
+            for j, i in enumerate(indices[:2 * len(RECORD_STATS)]):
+                race_type: RaceType = RaceType.SPRINT if j < len(RECORD_STATS) else RaceType.ROUTE
+                layout.append((i, course, race_type, RECORD_STATS[j % len(RECORD_STATS)]))
+        return layout
+
+    def __str__(self):
+        return f'TableSchema(table_name={self.table_name}, column_names={self.column_names})'
+
+    def __repr__(self):
+        return f'TableSchema(table_name={self.table_name}, column_names={self.column_names})'
+
+
+class StorageSession:
+    '''
+    A DB-API connection and the one cursor kept open on it, which the statements of a
+    StorageBackend run on.
+    '''
+    def __init__(self, connection: Any):
+        self.connection: Any = connection
+        self.cursor: Any = connection.cursor()
+
+    def execute(self, query_string: str, parameters: Any = None) -> Any:
+        count('db_round_trips')
+        if parameters is None:
+            return self.cursor.execute(query_string)
+        return self.cursor.execute(query_string, parameters)
+
+    def executemany(self, query_string: str, parameters: list) -> Any:
+        count('db_round_trips')
+        count('db_rows_written', len(parameters))
+        return self.cursor.executemany(query_string, parameters)
+
+    def fetchall(self) -> list:
+        rows: list = self.cursor.fetchall()
+        count('db_rows_read', len(rows))
+        return rows
+
+    def commit(self) -> None:
+        self.connection.commit()
+
+    def rollback(self) -> None:
+        self.connection.rollback()
+
+    def close(self) -> None:
+        try:
+            self.cursor.close()
+        except Exception:
+            pass
+        try:
+            self.connection.close()
+        except Exception:
+            pass
+
+
+class StorageBackend(ABC):
+    '''
+    The results table operations, written once against a DB-API session. A backend supplies
+    the session (run), the SQL that differs between databases, and the error raised for a
+    duplicate key; the wide and long layouts, the schema cache and the record cache all live here.
+
+    Given a RecordCache, get_record reads through it and add_record and add_records drop the
+    cached entries of the dates they write.
+    '''
+    integrity_errors: tuple[type[Exception], ...] = ()
+
+    def __init__(self, record_cache: RecordCache | None = None):
+        self.record_cache: RecordCache | None = record_cache
+        self.schemas: dict[str, TableSchema] = {}
+        self.known_tables: set[str] = set()
+
+    @abstractmethod
+    def run(self, operation: Callable[[StorageSession], T]) -> T:
+        '''
+        Run operation on a session and return its result. Operations commit at their end; if
+        one raises, its transaction is rolled back.
+        '''
+        pass
+
+    @abstractmethod
+    def get_create_table_string(self, table_name: str, columns: list[tuple[str, str]]) -> str:
+        pass
+
+    @abstractmethod
+    def get_create_long_table_string(self, table_name: str) -> str:
+        pass
+
+    @abstractmethod
+    def get_column_names_string(self, table_name: str) -> str:
+        '''
+        A query returning the column names of table_name, one per row, in ordinal order.
+        '''
+        pass
+
+    @abstractmethod
+    def get_existing_indices(self, session: StorageSession, table_name: str, dates: list[str]) -> set[int]:
+        '''
+        The positions in dates of the dates that already have a row in the table.
+        '''
+        pass
+
+    def call(self, name: str, operation: Callable[[StorageSession], T]) -> T:
+        '''
+        run, timed as db.<name>.
+        '''
+        with timer(f'db.{name}'):
+            return self.run(operation)
+
+    def normalize_date(self, race_date: str) -> str:
+        '''
+        The form race_date is written and compared in.
+        '''
+        return f'{race_date}'
+
+    def close(self) -> None:
+        pass
+
+    def invalidate_schema(self, table_name: str | None = None) -> None:
+        '''
+        Drop the cached schema of table_name, or of every table, e.g. after altering a table
+        outside this manager.
+        '''
+        if table_name is None:
+            self.schemas.clear()
+            self.known_tables.clear()
+        else:
+            self.schemas.pop(table_name, None)
+            self.known_tables.discard(table_name)
+
+    def create_table_if_not_exists(self, table_name: str, columns: list[tuple[str, str]]) -> None:
+        if table_name in self.known_tables:
+            return
+        execution_string: str = self.get_create_table_string(table_name, columns)
+
+        def create(session: StorageSession) -> None:
+            session.execute(execution_string)
+            session.commit()
+
+        self.call('create_table', create)
+        self.invalidate_schema(table_name)
+        self.known_tables.add(table_name)
+
+    def get_schema(self, table_name: str) -> TableSchema:
+        schema: TableSchema | None = self.schemas.get(table_name)
+        if schema is None:
+            column_names: list[str] = []
+            query_string: str = self.get_column_names_string(table_name)
+
+            def fetch(session: StorageSession) -> list:
+                session.execute(query_string)
+                return session.fetchall()
+
+            for row in self.call('get_schema', fetch):
+                column_names.append(row[0])
+            schema = TableSchema(table_name, column_names)
+            if column_names:
+                # A missing table is looked up again next time
+                self.schemas[table_name] = schema
+                self.known_tables.add(table_name)
+        return schema
+
+    def get_column_names(self, table_name: str) -> list[str]:
+        return list(self.get_schema(table_name).column_names)
+
+    def get_row_values(self, column_names: list[str], values: list[tuple[float, float] | str]) -> list[str | float]:
+        '''
+        Flatten a record in the add_record format into one parameter per column.
+        '''
+        assert ((len(values) - 1) / 8) == ((len(column_names) - 1) / 14)
+        n_surfaces: float = (len(values) - 1) / 8
+        assert (n_surfaces % 1) == 0
+        count: int = int(n_surfaces)
+        row_vals: list[str | float] = [self.normalize_date(values[0])]  # type: ignore
+        for i in range(1, count * 8 + 1):
+            if type(values[i]) is str:
+                row_vals.append(values[i])  # type: ignore
+            elif type(values[i]) is tuple:
+                row_vals.append(values[i][0])
+                row_vals.append(values[i][1])
+        return [0.0 if val is nan else val for val in row_vals]
+
+    def add_record(self, table_name: str, values: list[tuple[float, float] | str]) -> None:
+        '''
+        Add a row to the given database.
+
+        values are passed in as a list in the following format:
+            date_str, (min_fr1, max_fr1), (min_fr2, max_fr2), (min_fr3, max_fr3), comment, ...
+        so the length of values should be equal to (len(column_names) - 2) / 2
+        '''
+        schema: TableSchema = self.get_schema(table_name)
+        clean_row_vals: list[str | float] = self.get_row_values(schema.column_names, values)
+
+        def insert(session: StorageSession) -> None:
+            try:
+                session.execute(schema.insert_string, clean_row_vals)
+                count('db_rows_written')
+            except self.integrity_errors:
+                pass
+            session.commit()
+
+        self.call('add_record', insert)
+        if self.record_cache is not None:
+            self.record_cache.invalidate(table_name, [f'{values[0]}'])
+
+    def add_records(self, table_name: str, records: list[list[tuple[float, float] | str]],
+                    batch_size: int = DEFAULT_BATCH_SIZE) -> list[str]:
+        '''
+        Add many rows, each in the add_record format, in a single transaction.
+
+        Records are sent batch_size at a time: one query finds the dates of the batch that are
+        already in the table, then the rest go in with one executemany. Dates that already exist,
+        or that repeat within records, are not inserted and are returned instead. Nothing is
+        committed if any batch fails.
+        '''
+        if batch_size < 1:
+            raise ValueError(f'batch_size must be at least 1, got {batch_size}')
+        schema: TableSchema = self.get_schema(table_name)
+
+        def insert(session: StorageSession) -> list[str]:
+            # run rolls the transaction back if anything here raises
+            duplicates: list[str] = []
+            seen: set[str] = set()
+            for start in range(0, len(records), batch_size):
+                batch: list[list[tuple[float, float] | str]] = records[start:start + batch_size]
+                dates: list[str] = [f'{record[0]}' for record in batch]
+                existing: set[int] = self.get_existing_indices(session, table_name, dates)
+                rows: list[list[str | float]] = []
+                for i, record in enumerate(batch):
+                    # Compare dates the way the table stores them, so 20250105 and 2025-01-05 are one day
+                    date_key: str = self.normalize_date(dates[i]).replace('-', '')
+                    if i in existing or date_key in seen:
+                        duplicates.append(dates[i])
+                        continue
+                    seen.add(date_key)
+                    rows.append(self.get_row_values(schema.column_names, record))
+                if rows:
+                    session.executemany(schema.insert_string, rows)
+            session.commit()
+            return duplicates
+
+        try:
+            return self.call('add_records', insert)
+        finally:
+            if self.record_cache is not None:
+                self.record_cache.invalidate(table_name, [f'{record[0]}' for record in records])
+
+    def get_record(self, table_name: str, race_date: str, course: CourseType, race_type: RaceType) -> list[float | str]:
+        if self.record_cache is None:
+            return self.fetch_record(table_name, race_date, course, race_type)
+        key: RecordKey = RecordCache.get_key(table_name, race_date, course, race_type)
+        ret: list[float | str] | None = self.record_cache.get(key)
+        if ret is None:
+            # Returned as put stores it, so a miss and a later hit give the same values
+            ret = self.record_cache.put(key, self.fetch_record(table_name, race_date, course, race_type))
+        return ret
+
+    def fetch_record(self, table_name: str, race_date: str, course: CourseType,
+                     race_type: RaceType) -> list[float | str]:
+        ret: list[float | str] = []
+        schema: TableSchema = self.get_schema(table_name)
+        if not schema.get_course_slice(course, race_type):
+            return ret
+        query_string: str = schema.get_projection_string(course, race_type)
+
+        def fetch(session: StorageSession) -> list:
+            session.execute(query_string, [self.normalize_date(race_date)])
+            return session.fetchall()
+
+        fetch_result = self.call('fetch_record', fetch)
+        if fetch_result:
+            ret = list(fetch_result[0])
+            if type(ret[-1]) is str:
+                ret[-1] = ret[-1].rstrip()
+        return ret
+
+    def get_records(self, table_name: str, start: str, end: str, course: CourseType,
+                    race_type: RaceType) -> pd.DataFrame:
+        '''
+        The get_record columns of every date from start to end inclusive, fetched with one query.
+
+        Returns a DataFrame indexed by DATE, in date order, with one column per selected table
+        column; it is empty when the table has no columns for course and race_type.
+        '''
+        schema: TableSchema = self.get_schema(table_name)
+        column_names: list[str] = schema.get_course_columns(course, race_type)
+        if not column_names:
+            return pd.DataFrame(index=pd.Index([], name='DATE'))
+        query_string: str = schema.get_projection_string(course, race_type, date_range=True)
+
+        def fetch(session: StorageSession) -> list:
+            session.execute(query_string, [self.normalize_date(start), self.normalize_date(end)])
+            return session.fetchall()
+
+        frame: pd.DataFrame = pd.DataFrame.from_records(
+            [tuple(row) for row in self.call('get_records', fetch)], columns=['DATE', *column_names], index='DATE'
+        )
+        for column_name in frame.select_dtypes(exclude='number').columns:
+            frame[column_name] = frame[column_name].map(lambda value: value.rstrip() if type(value) is str else value)
+        return frame
+
+    def create_long_table_if_not_exists(self, table_name: str) -> None:
+        '''
+        Create a results table in the long layout: one row per date, course, race type and stat,
+        clustered on (COURSE, RACE_TYPE, DATE, STAT) so reading one course and race type over a
+        range of dates is a single index seek. Fractions go in VALUE and the comment in TEXT;
+        COURSE and RACE_TYPE hold the CourseType and RaceType values, so a new surface needs no
+        new columns.
+        '''
+        if table_name in self.known_tables:
+            return
+        execution_string: str = self.get_create_long_table_string(table_name)
+
+        def create(session: StorageSession) -> None:
+            session.execute(execution_string)
+            session.commit()
+
+        self.call('create_long_table', create)
+        self.invalidate_schema(table_name)
+        self.known_tables.add(table_name)
+
+    def get_long_rows(self, race_date: str, course: CourseType, race_type: RaceType,
+                      values: list[tuple[float, float] | str]) -> list[LongRow]:
+        '''
+        The long layout rows of one course and race type, from the four values add_record takes
+        for it: (min_fr1, max_fr1), (min_fr2, max_fr2), (min_fr3, max_fr3), comment.
+        '''
+        if len(values) != 4:
+            raise ValueError(f'expected 3 fraction pairs and a comment, got {len(values)} values')
+        course = get_stored_course(course)
+        race_date = self.normalize_date(race_date)
+        flat: list[float | str] = []
+        for value in values[:3]:
+            flat.extend(value)  # type: ignore
+        rows: list[LongRow] = [
+            (race_date, course.value, race_type.value, stat, 0.0 if value is nan else value, None)  # type: ignore
+            for stat, value in zip(RECORD_STATS, flat)
+        ]
+        rows.append((race_date, course.value, race_type.value, RECORD_STATS[-1], None, f'{values[3]}'))
+        return rows
+
+    def add_long_rows(self, table_name: str, rows: list[LongRow],
+                      batch_size: int = DEFAULT_BATCH_SIZE) -> None:
+        '''
+        Bulk load rows from get_long_rows in a single transaction, batch_size rows per
+        executemany. Rows whose key is already in the table are left as they are.
+        '''
+        if batch_size < 1:
+            raise ValueError(f'batch_size must be at least 1, got {batch_size}')
+        insert_string: str = f'INSERT INTO {table_name} (DATE,COURSE,RACE_TYPE,STAT,VALUE,TEXT) '\
+                             f'SELECT ?,?,?,?,?,? WHERE NOT EXISTS (SELECT 1 FROM {table_name} '\
+                             f'WHERE COURSE = ? AND RACE_TYPE = ? AND DATE = ? AND STAT = ?);'
+
+        def insert(session: StorageSession) -> None:
+            for start in range(0, len(rows), batch_size):
+                session.executemany(insert_string, [
+                    [*row, row[1], row[2], row[0], row[3]] for row in rows[start:start + batch_size]
+                ])
+            session.commit()
+
+        if rows:
+            self.call('add_long_rows', insert)
+
+    def add_long_record(self, table_name: str, race_date: str, course: CourseType, race_type: RaceType,
+                        values: list[tuple[float, float] | str]) -> None:
+        self.add_long_rows(table_name, self.get_long_rows(race_date, course, race_type, values))
+
+    def migrate_to_long_table(self, wide_table_name: str, long_table_name: str,
+                              batch_size: int = DEFAULT_BATCH_SIZE) -> int:
+        '''
+        Copy every row of a wide table into a long table, creating it if needed, and return the
+        number of long rows written. Rows already in the long table are kept, so an interrupted
+        migration can simply be run again.
+        '''
+        schema: TableSchema = self.get_schema(wide_table_name)
+        layout: list[tuple[int, CourseType, RaceType, str]] = schema.get_column_layout()
+        date_idx: int = schema.ordinal_positions['DATE'] - 1
+        self.create_long_table_if_not_exists(long_table_name)
+        query_string: str = f'SELECT * FROM {wide_table_name} ORDER BY DATE;'
+
+        def fetch(session: StorageSession) -> list:
+            session.execute(query_string)
+            return session.fetchall()
+
+        rows: list[LongRow] = []
+        for wide_row in self.call('migrate_to_long_table', fetch):
+            race_date: str = self.normalize_date(wide_row[date_idx])
+            for i, course, race_type, stat in layout:
+                value = wide_row[i]
+                if stat == RECORD_STATS[-1]:
+                    rows.append((race_date, course.value, race_type.value, stat, None,
+                                 value.rstrip() if type(value) is str else value))
+                else:
+                    rows.append((race_date, course.value, race_type.value, stat, value, None))
+        self.add_long_rows(long_table_name, rows, batch_size)
+        return len(rows)
+
+    def get_long_stats(self, table_name: str, start: str, end: str, course: CourseType,
+                       race_type: RaceType) -> dict[object, dict[str, float | str | None]]:
+        '''
+        The stats of course and race_type in a long table for every date from start to end
+        inclusive, by date and then by stat, in date order.
+        '''
+        query_string: str = f'SELECT DATE,STAT,VALUE,TEXT FROM {table_name} '\
+                            f'WHERE COURSE = ? AND RACE_TYPE = ? AND DATE BETWEEN ? AND ? ORDER BY DATE;'
+
+        def fetch(session: StorageSession) -> list:
+            session.execute(query_string, [get_stored_course(course).value, race_type.value,
+                                                 self.normalize_date(start), self.normalize_date(end)])
+            return session.fetchall()
+
+        records: dict[object, dict[str, float | str | None]] = {}
+        for race_date, stat, value, text in self.call('get_long_stats', fetch):
+            record: dict[str, float | str | None] = records.setdefault(race_date, {})
+            record[stat.rstrip()] = text.rstrip() if type(text) is str else value
+        return records
+
+    def get_long_records(self, table_name: str, start: str, end: str, course: CourseType,
+                         race_type: RaceType) -> pd.DataFrame:
+        '''
+        get_records for a long table: one row per date from start to end inclusive, indexed by
+        DATE, with one column per stat in RECORD_STATS order.
+        '''
+        frame: pd.DataFrame = pd.DataFrame.from_dict(
+            self.get_long_stats(table_name, start, end, course, race_type), orient='index', columns=list(RECORD_STATS)
+        )
+        frame.index.name = 'DATE'
+        return frame
+
+    def get_long_record(self, table_name: str, race_date: str, course: CourseType,
+                        race_type: RaceType) -> list[float | str]:
+        '''
+        get_record for a long table: the stats of one date in RECORD_STATS order, or [] if the
+        date has none for course and race_type.
+        '''
+        records: dict[object, dict[str, float | str | None]] = \
+            self.get_long_stats(table_name, race_date, race_date, course, race_type)
+        if not records:
+            return []
+        stats: dict[str, float | str | None] = next(iter(records.values()))
+        return [stats.get(stat) for stat in RECORD_STATS]  # type: ignore
+
+
+class SQLiteBackend(StorageBackend):
+    '''
+    Keeps the results tables in a local SQLite database (in memory by default), so reports,
+    benchmarks and tests can run with no SQL Server. Dates are stored as YYYY-MM-DD text.
+    One connection is shared, and its statements are serialized, across threads.
+    '''
+    integrity_errors: tuple[type[Exception], ...] = (sqlite3.IntegrityError,)
+
+    def __init__(self, path: str = ':memory:', record_cache: RecordCache | None = None):
+        super().__init__(record_cache)
+        self.path: str = path
+        self.session: StorageSession = StorageSession(sqlite3.connect(path, check_same_thread=False))
+        self.lock: RLock = RLock()
+
+    def run(self, operation: Callable[[StorageSession], T]) -> T:
+        with self.lock:
+            try:
+                return operation(self.session)
+            except BaseException:
+                self.session.rollback()
+                raise
+
+    def get_create_table_string(self, table_name: str, columns: list[tuple[str, str]]) -> str:
+        column_strings: list[str] = ['DATE DATE PRIMARY KEY'] + [f'{name} {datatype}' for name, datatype in columns]
+        return f'CREATE TABLE IF NOT EXISTS {table_name}({",".join(column_strings)});'
+
+    def get_create_long_table_string(self, table_name: str) -> str:
+        return f'CREATE TABLE IF NOT EXISTS {table_name}('\
+               f'DATE TEXT NOT NULL,'\
+               f'COURSE INTEGER NOT NULL,'\
+               f'RACE_TYPE INTEGER NOT NULL,'\
+               f'STAT TEXT NOT NULL,'\
+               f'VALUE REAL,'\
+               f'TEXT TEXT,'\
+               f'PRIMARY KEY (COURSE, RACE_TYPE, DATE, STAT)'\
+               f') WITHOUT ROWID;'
+
+    def get_column_names_string(self, table_name: str) -> str:
+        return f'SELECT name FROM pragma_table_info(\'{table_name}\') ORDER BY cid;'
+
+    def get_existing_indices(self, session: StorageSession, table_name: str, dates: list[str]) -> set[int]:
+        normalized_dates: list[str] = [self.normalize_date(race_date) for race_date in dates]
+        found: set[str] = set()
+        for start in range(0, len(normalized_dates), MAXIMUM_SQLITE_PARAMETERS):
+            chunk: list[str] = normalized_dates[start:start + MAXIMUM_SQLITE_PARAMETERS]
+            query_string: str = f'SELECT DATE FROM {table_name} WHERE DATE IN ({",".join("?" * len(chunk))});'
+            session.execute(query_string, chunk)
+            for row in session.fetchall():
+                found.add(row[0])
+        return {i for i, race_date in enumerate(normalized_dates) if race_date in found}
+
+    def normalize_date(self, race_date: str) -> str:
+        race_date = f'{race_date}'
+        if len(race_date) == 8 and race_date.isdigit():
+            return f'{race_date[:4]}-{race_date[4:6]}-{race_date[6:]}'
+        return race_date
+
+    def close(self) -> None:
+        self.session.close()
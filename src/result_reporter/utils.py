@@ -1,22 +1,31 @@
 #! python3
 
+from concurrent.futures import ProcessPoolExecutor
 import csv
 from datetime import datetime
 from enum import Enum
+from functools import partial
+from itertools import islice
 from math import floor, nan
 import os
+from typing import Callable, Iterable, Iterator
 
-from openpyxl import Workbook
-from openpyxl.styles import Alignment, Font
-from openpyxl.worksheet.worksheet import Worksheet
 from pydrf.textchart import Header, RaceData, StarterPerformanceData, RecordType, CourseCodes
 
+from .cache import ChartCache
 from .chart import Chart
+from .columnar import ShakeUpFractions, WinnerColumns
 from .coursetype import CourseType
+from .instrument import count, timer
+from .manifest import ChartManifest, split_chart_name
+from .race import Race
+from .recordlayout import get_official_finish_column
 from .report import BrohamerReport, ShakeUpReport, DEFAULT_MAXIMUM_SPRINT_DISTANCE
+from .workbook import GuideWriter, WorkbookGuideWriter, get_guide_writer
 
 
 TAKEOUT_PCT: float = 0.2
+DEFAULT_AGGREGATE_BATCH_SIZE: int = 64
 
 
 class DistanceKey(Enum):
@@ -24,52 +33,411 @@ class DistanceKey(Enum):
     ROUTE = 1
 
 
-def parse_chart(path: str) -> Chart | None:
+CHART_RECORD_TYPES: tuple[RecordType, ...] = (RecordType.STARTER, RecordType.RACE, RecordType.HEADER)
+WINNERS_ONLY: frozenset[int] = frozenset((1,))
+
+
+def parse_float(field: str) -> float | None:
+    try:
+        return float(field)
+    except ValueError:
+        return None
+
+
+class StarterFinishFilter:
+    '''
+    Decide from the raw fields of a starter record whether it is worth building.
+
+    The official finish is read from the column pydrf copies it from (see
+    get_official_finish_column), and a record is only built when that column holds one of
+    the wanted finish positions. If pydrf does not copy official_finish verbatim from one
+    column, every starter is built and filtered on its official finish instead.
+    '''
+    def __init__(self, finish_positions: Iterable[int]):
+        self.finish_positions: frozenset[int] = frozenset(finish_positions)
+        self.column: int | None = get_official_finish_column()
+
+    def wants(self, line: list[str]) -> bool:
+        if self.column is None:
+            return True
+        return self.column < len(line) and parse_float(line[self.column]) in self.finish_positions
+
+
+class ChartFilter:
+    '''
+    Which charts to parse: those raced from start to end inclusive (YYYYMMDD, either may be
+    omitted) at one of track_codes (any track if None).
+
+    wants_path judges a chart by its file name, so most files are turned away without being
+    opened; files whose name does not tell are judged by wants_header on their header record,
+    before any of their race or starter records are built.
+    '''
+    def __init__(self, start: str | None = None, end: str | None = None, track_codes: Iterable[str] | None = None):
+        self.start: str | None = start
+        self.end: str | None = end
+        self.track_codes: frozenset[str] | None = None if track_codes is None else frozenset(track_codes)
+
+    def wants(self, track_code: str | None, race_date: str | None) -> bool:
+        '''
+        Whether a chart of track_code raced on race_date passes; None (not known yet) passes.
+        '''
+        if track_code and self.track_codes is not None and track_code.strip() not in self.track_codes:
+            return False
+        if race_date:
+            if self.start is not None and race_date < self.start:
+                return False
+            if self.end is not None and race_date > self.end:
+                return False
+        return True
+
+    def wants_path(self, path: str) -> bool:
+        parts: tuple[str, str] | None = split_chart_name(os.path.basename(path))
+        if parts is None:
+            return True
+        return self.wants(parts[0], parts[1] or None)
+
+    def wants_header(self, header: Header) -> bool:
+        return self.wants(header.track_code, header.race_date)
+
+    def get_variant(self) -> str:
+        '''
+        The part of a ChartCache variant naming this filter; a filtered parse of a multi-card file
+        holds only the wanted cards, so it must not share an entry with the unfiltered one.
+        '''
+        track_codes: str = '*' if self.track_codes is None else ','.join(sorted(self.track_codes))
+        return f'{self.start or ""}-{self.end or ""}@{track_codes}'
+
+    def __str__(self):
+        ret = ''
+        for k, v in vars(self).items():
+            ret += f'{k}={v}, '
+        return f'ChartFilter({ret[:-2]})'
+
+    def __repr__(self):
+        ret = ''
+        for k, v in vars(self).items():
+            ret += f'{k}={v}, '
+        return f'ChartFilter({ret[:-2]})'
+
+
+def get_record_type(line: str) -> str:
+    end: int = line.find(',')
+    return (line if end < 0 else line[:end]).strip().strip('"')
+
+
+def iter_chart_lines(chart_file: Iterable[str]) -> Iterator[str]:
+    for line in chart_file:
+        if get_record_type(line) in CHART_RECORD_TYPES:
+            yield line
+
+
+def iter_chart_records(chart_file: Iterable[str], finish_positions: Iterable[int] | None = None,
+                       chart_filter: ChartFilter | None = None) -> Iterator[Header | RaceData | StarterPerformanceData]:
+    '''
+    Lazily yield the header, race and starter records of a DRF text chart.
+
+    Lines are pulled from chart_file one at a time and every other record type (exotic wagering,
+    attendance, comments, footnotes) is rejected on its first field before the line is split,
+    so memory use stays flat however large the file is.
+
+    Pass finish_positions (e.g. WINNERS_ONLY) to yield only the starters that finished in
+    those positions; the rest of the field is skipped without being built where possible.
+    Given a chart_filter, a card whose header it rejects is skipped, header included, without
+    building any of its race or starter records.
+    '''
+    starter_filter: StarterFinishFilter | None = None
+    if finish_positions is not None:
+        starter_filter = StarterFinishFilter(finish_positions)
+    skipping: bool = False
+    for line in csv.reader(iter_chart_lines(chart_file)):
+        if line[0] == RecordType.HEADER:
+            header: Header = Header.create(line)
+            skipping = chart_filter is not None and not chart_filter.wants_header(header)
+            if not skipping:
+                yield header
+        elif skipping:
+            continue
+        elif line[0] == RecordType.STARTER:
+            if starter_filter is None:
+                yield StarterPerformanceData.create(line)
+            elif starter_filter.wants(line):
+                starter: StarterPerformanceData = StarterPerformanceData.create(line)
+                if starter.official_finish in starter_filter.finish_positions:
+                    yield starter
+        elif line[0] == RecordType.RACE:
+            yield RaceData.create(line)
+
+
+def iter_charts(path: str, finish_positions: Iterable[int] | None = None,
+                chart_filter: ChartFilter | None = None) -> Iterator[Chart]:
+    '''
+    Yield one Chart per card in a (possibly multi-card) chart file, holding at most one card in memory.
+    '''
     header: Header | None = None
     race_data: list[RaceData] = []
     starters_performance_data: list[StarterPerformanceData] = []
-    try:
-        with open(path) as chart_file:
-            reader = csv.reader(chart_file.readlines())
-            for line in reader:
-                if line[0] == RecordType.HEADER:
-                    header = Header.create(line)
-                elif line[0] == RecordType.RACE:
-                    race_data.append(RaceData.create(line))
-                elif line[0] == RecordType.STARTER:
-                    starters_performance_data.append(StarterPerformanceData.create(line))
-                elif line[0] == RecordType.EXOTIC_WAGERING:
-                    pass
-                elif line[0] == RecordType.ATTENDANCE:
-                    pass
-                elif line[0] == RecordType.COMMENT:
-                    pass
-                elif line[0] == RecordType.FOOTNOTE:
-                    pass
-        if header and race_data and starters_performance_data:
+    with open(path) as chart_file:
+        for record in iter_chart_records(chart_file, finish_positions, chart_filter):
+            if isinstance(record, StarterPerformanceData):
+                starters_performance_data.append(record)
+            elif isinstance(record, RaceData):
+                race_data.append(record)
+            else:
+                if header and race_data and starters_performance_data:
+                    yield Chart(header, race_data, starters_performance_data)
+                header = record
+                race_data = []
+                starters_performance_data = []
+    if header and race_data and starters_performance_data:
+        yield Chart(header, race_data, starters_performance_data)
+
+
+def build_chart(chart_file: Iterable[str], finish_positions: Iterable[int] | None = None,
+                chart_filter: ChartFilter | None = None) -> Chart | None:
+    '''
+    The Chart held in the lines of chart_file, or None if they lack a header, races or starters
+    (or chart_filter rejects the header).
+    '''
+    header: Header | None = None
+    race_data: list[RaceData] = []
+    starters_performance_data: list[StarterPerformanceData] = []
+    for record in iter_chart_records(chart_file, finish_positions, chart_filter):
+        if isinstance(record, StarterPerformanceData):
+            starters_performance_data.append(record)
+        elif isinstance(record, RaceData):
+            race_data.append(record)
+        else:
+            header = record
+    if header and race_data and starters_performance_data:
+        count('races', len(race_data))
+        count('starters', len(starters_performance_data))
+        with timer('chart_build'):
             return Chart(
                 header,
                 race_data,
                 starters_performance_data
             )
-        return None
+    return None
+
+
+def parse_chart(path: str, cache: ChartCache | None = None, finish_positions: Iterable[int] | None = None,
+                chart_filter: ChartFilter | None = None) -> Chart | None:
+    try:
+        return _parse_chart(path, cache, finish_positions, chart_filter)
     except FileNotFoundError as e:
         print(f'[{e}]: could not find file {path}')
         return None
 
 
-def get_charts(path: str, track_code: str) -> list[Chart]:
-    charts: list[Chart] = []
-    for dir in os.listdir(path):
+def _parse_chart(path: str, cache: ChartCache | None, finish_positions: Iterable[int] | None,
+                 chart_filter: ChartFilter | None) -> Chart | None:
+    '''
+    parse_chart, letting every error, a missing file included, reach the caller.
+    '''
+    variant: str = ''
+    if finish_positions is not None:
+        finish_positions = frozenset(finish_positions)
+        variant = ','.join(str(position) for position in sorted(finish_positions))
+    if chart_filter is not None:
+        variant = f'{variant}|{chart_filter.get_variant()}'
+    if cache:
+        cached_chart: Chart | None = cache.load(path, variant)
+        if cached_chart:
+            count('chart_cache_hits')
+            return cached_chart
+    count('files')
+    with timer('parse_chart'), open(path) as chart_file:
+        chart: Chart | None = build_chart(chart_file, finish_positions, chart_filter)
+    if chart and cache:
+        cache.store(path, chart, variant)
+    return chart
+
+
+class ChartFailure:
+    def __init__(self, path: str, error: str):
+        self.path: str = path
+        self.error: str = error
+
+    def __str__(self):
+        return f'ChartFailure(path={self.path}, error={self.error})'
+
+    def __repr__(self):
+        return f'ChartFailure(path={self.path}, error={self.error})'
+
+
+class ChartBatch:
+    def __init__(self, charts: list[Chart], failures: list[ChartFailure]):
+        self.charts: list[Chart] = charts
+        self.failures: list[ChartFailure] = failures
+
+    def __str__(self):
+        return f'ChartBatch(charts={len(self.charts)}, failures={self.failures})'
+
+    def __repr__(self):
+        return f'ChartBatch(charts={len(self.charts)}, failures={self.failures})'
+
+
+def is_track_chart(file_name: str, track_code: str) -> bool:
+    return file_name[:len(track_code)] == track_code and \
+        file_name[len(track_code):len(track_code) + 1].isdigit()
+
+
+def get_chart_race_date(file_name: str, track_code: str) -> str | None:
+    '''
+    The race date (YYYYMMDD) a chart file name carries after its track code, if it has one.
+    '''
+    digits: str = file_name[len(track_code):len(track_code) + 8]
+    if len(digits) == 8 and digits.isdigit():
+        try:
+            datetime.strptime(digits, '%Y%m%d')
+            return digits
+        except ValueError:
+            pass
+    return None
+
+
+def read_chart_header(path: str) -> Header | None:
+    with open(path) as chart_file:
+        for record in iter_chart_records(chart_file):
+            if isinstance(record, Header):
+                return record
+    return None
+
+
+def get_chart_paths(path: str, track_code: str) -> list[str]:
+    chart_paths: list[str] = []
+    for dir in sorted(os.listdir(path)):
         dir_path = os.path.join(path, dir)
-        for chart_path in os.listdir(dir_path):
-            if chart_path[:len(track_code)] == track_code and \
-                    chart_path[len(track_code)].isdigit():
-                chart_path = os.path.join(dir_path, chart_path)
-                chart: Chart | None = parse_chart(chart_path)
-                if chart:
-                    charts.append(chart)
-    return charts
+        for chart_path in sorted(os.listdir(dir_path)):
+            if is_track_chart(chart_path, track_code):
+                chart_paths.append(os.path.join(dir_path, chart_path))
+    return chart_paths
+
+
+def _load_chart(path: str, cache: ChartCache | None = None, finish_positions: Iterable[int] | None = None,
+                chart_filter: ChartFilter | None = None) -> tuple[str, Chart | None, str | None]:
+    try:
+        return path, _parse_chart(path, cache, finish_positions, chart_filter), None
+    except Exception as e:
+        return path, None, f'{type(e).__name__}: {e}'
+
+
+def _load_charts(chart_paths: list[str], workers: int | None, cache: ChartCache | None,
+                 finish_positions: Iterable[int] | None, chart_filter: ChartFilter | None = None) -> \
+        tuple[list[tuple[str, Chart]], list[ChartFailure]]:
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if workers < 1:
+        raise ValueError(f'workers must be at least 1, got {workers}')
+    if chart_filter is not None:
+        chart_paths = [chart_path for chart_path in chart_paths if chart_filter.wants_path(chart_path)]
+    results: list[tuple[str, Chart | None, str | None]]
+    if workers == 1 or len(chart_paths) < 2:
+        results = [_load_chart(chart_path, cache, finish_positions, chart_filter) for chart_path in chart_paths]
+    else:
+        chunksize: int = max(1, len(chart_paths) // (workers * 4))
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            load = partial(_load_chart, cache=cache, finish_positions=finish_positions, chart_filter=chart_filter)
+            results = list(executor.map(load, chart_paths, chunksize=chunksize))
+    loaded: list[tuple[str, Chart]] = []
+    failures: list[ChartFailure] = []
+    for chart_path, chart, error in results:
+        if error is not None:
+            failures.append(ChartFailure(chart_path, error))
+        elif chart:
+            loaded.append((chart_path, chart))
+    loaded.sort(key=lambda item: (item[1].race_date, item[0]))
+    return loaded, failures
+
+
+def load_charts(chart_paths: list[str], workers: int | None = None, cache: ChartCache | None = None,
+                finish_positions: Iterable[int] | None = None, chart_filter: ChartFilter | None = None) -> ChartBatch:
+    '''
+    Parse every file in chart_paths, spreading the work over a pool of worker processes.
+
+    workers defaults to the number of CPUs; workers=1 parses in this process. Charts are
+    returned in race date order (ties broken by path) no matter which worker finished first,
+    and a file that is missing or raises is recorded in the batch failures instead of aborting
+    the batch. Given a chart_filter, only the charts it wants are parsed.
+    '''
+    loaded, failures = _load_charts(chart_paths, workers, cache, finish_positions, chart_filter)
+    return ChartBatch([chart for __, chart in loaded], failures)
+
+
+def get_charts_bulk(path: str, track_codes: list[str], workers: int | None = None,
+                    cache: ChartCache | None = None, finish_positions: Iterable[int] | None = None,
+                    manifest: ChartManifest | None = None, chart_filter: ChartFilter | None = None) -> \
+        dict[str, ChartBatch]:
+    '''
+    Parse the charts of several tracks with a single walk of path and a single process pool.
+    Returns one ChartBatch per track code.
+
+    Given a ChartManifest of path, the files are looked up in it (after a refresh) instead.
+    '''
+    owners: dict[str, str] = {}
+    if manifest is not None:
+        manifest.refresh()
+        for track_code in track_codes:
+            for chart_path in manifest.find(track_code):
+                owners.setdefault(chart_path, track_code)
+    else:
+        for dir in sorted(os.listdir(path)):
+            dir_path = os.path.join(path, dir)
+            for chart_path in sorted(os.listdir(dir_path)):
+                for track_code in track_codes:
+                    if is_track_chart(chart_path, track_code):
+                        owners[os.path.join(dir_path, chart_path)] = track_code
+                        break
+    loaded, failures = _load_charts(list(owners), workers, cache, finish_positions, chart_filter)
+    batches: dict[str, ChartBatch] = {track_code: ChartBatch([], []) for track_code in track_codes}
+    for chart_path, chart in loaded:
+        batches[owners[chart_path]].charts.append(chart)
+    for failure in failures:
+        batches[owners[failure.path]].failures.append(failure)
+    return batches
+
+
+def get_track_chart_paths(path: str, track_code: str, manifest: ChartManifest | None = None) -> list[str]:
+    if manifest is not None:
+        manifest.refresh()
+        return manifest.find(track_code)
+    return get_chart_paths(path, track_code)
+
+
+def iter_track_charts(path: str, track_code: str, cache: ChartCache | None = None,
+                      finish_positions: Iterable[int] | None = None, manifest: ChartManifest | None = None,
+                      chart_filter: ChartFilter | None = None) -> Iterator[Chart]:
+    '''
+    Parse the charts for track_code under path one at a time, in file order, so that only the
+    chart in use is held in memory; the arguments are those of get_charts.
+    '''
+    for chart_path in get_track_chart_paths(path, track_code, manifest):
+        if chart_filter is not None and not chart_filter.wants_path(chart_path):
+            continue
+        chart: Chart | None = parse_chart(chart_path, cache, finish_positions, chart_filter)
+        if chart:
+            yield chart
+
+
+def get_charts(path: str, track_code: str, workers: int = 1, cache: ChartCache | None = None,
+               finish_positions: Iterable[int] | None = None, manifest: ChartManifest | None = None,
+               chart_filter: ChartFilter | None = None) -> list[Chart]:
+    '''
+    Parse every chart for track_code under path.
+
+    The guide writers only read each race's winner, so pass finish_positions=WINNERS_ONLY
+    when building guides to skip building the rest of every field. Given a ChartManifest of
+    path, the files are looked up in it (after a refresh) instead of listing the archive.
+    Pass a chart_filter (e.g. ChartFilter(start='20240401')) to parse only the charts it
+    wants; the rest are dropped on their file name or header record.
+    '''
+    if workers == 1:
+        return list(iter_track_charts(path, track_code, cache, finish_positions, manifest, chart_filter))
+    batch: ChartBatch = load_charts(get_track_chart_paths(path, track_code, manifest), workers, cache,
+                                    finish_positions, chart_filter)
+    for failure in batch.failures:
+        print(f'[{failure.error}]: could not parse file {failure.path}')
+    return batch.charts
 
 
 def get_surfaces(charts: list[Chart]) -> list[str]:
@@ -81,6 +449,26 @@ def get_surfaces(charts: list[Chart]) -> list[str]:
     return sorted(surfaces)
 
 
+def read_chart_surfaces(path: str) -> set[str]:
+    '''
+    The course codes raced in a chart file, read from its race records alone.
+    '''
+    with open(path) as chart_file:
+        race_lines: Iterator[str] = (line for line in chart_file if get_record_type(line) == RecordType.RACE)
+        return {RaceData.create(line).course_type for line in csv.reader(race_lines)}
+
+
+def scan_surfaces(chart_paths: Iterable[str]) -> list[str]:
+    '''
+    get_surfaces of the charts in chart_paths without building them, so a guide header can be
+    written before the charts are parsed one at a time.
+    '''
+    surfaces: set[str] = set()
+    for chart_path in chart_paths:
+        surfaces |= read_chart_surfaces(chart_path)
+    return sorted(surfaces)
+
+
 def get_course_types(charts: list[Chart]) -> list[CourseType]:
     course_types: list[CourseType] = []
     for chart in charts:
@@ -96,6 +484,10 @@ def shakeup_report_distance_key_match(distance_key: DistanceKey, report: ShakeUp
             ((distance_key == DistanceKey.ROUTE) and (report.distance > DEFAULT_MAXIMUM_SPRINT_DISTANCE)))
 
 
+def get_distance_key(distance: float) -> DistanceKey:
+    return DistanceKey.SPRINT if distance <= DEFAULT_MAXIMUM_SPRINT_DISTANCE else DistanceKey.ROUTE
+
+
 def distance_key_match(distance_key: DistanceKey, distance: float) -> bool:
     return (((distance_key == DistanceKey.SPRINT) and (distance <= DEFAULT_MAXIMUM_SPRINT_DISTANCE)) or
             ((distance_key == DistanceKey.ROUTE) and (distance > DEFAULT_MAXIMUM_SPRINT_DISTANCE)))
@@ -119,6 +511,25 @@ def course_to_str(course: str) -> str:
     return ''
 
 
+def get_surface_title(surface: str) -> str:
+    '''
+    The name a guide header gives surface: course_to_str, or the raw code for a course it does not know.
+    '''
+    return course_to_str(surface) or surface
+
+
+def str_to_course(course_str: str) -> str:
+    '''
+    The course code of a get_surface_title name.
+    '''
+    for course in CourseCodes:
+        if course_to_str(course.value) == course_str:
+            return course.value
+    if course_str:
+        return course_str
+    raise ValueError(f'unknown course {course_str!r}')
+
+
 def course_to_excel_color(course: str) -> str:
     if course == CourseCodes.ALL_WEATHER_TRACK.value:
         return 'FF8C00'
@@ -134,7 +545,7 @@ def course_to_excel_color(course: str) -> str:
         return '154734'
     elif course == CourseCodes.TURF.value:
         return "178F17"
-    return ''
+    return '000000'  # unknown courses are written in black, like dirt
 
 
 class OddsLevel(Enum):
@@ -165,144 +576,154 @@ def get_expected_value_from_odds(odds: float) -> float:
     return ret
 
 
-def get_post_position_bias_comment(surface: str, distance_key: DistanceKey, chart: Chart) -> str:
-    ret = ''
-    total_count: int = 0
-    w_count13: int = 0
-    w_count46: int = 0
-    w_count79: int = 0
-    w_count1012: int = 0
-    w_total_odds13: float = 0
-    w_total_odds46: float = 0
-    w_total_odds79: float = 0
-    w_total_odds1012: float = 0
-    w_average_odds13: float = 0
-    w_average_odds46: float = 0
-    w_average_odds79: float = 0
-    w_average_odds1012: float = 0
-    for race in chart.races:
-        if race.data.breed_indicator != 'TB':
-            continue
-        winner: StarterPerformanceData = race.starters[0]
-        w_post_position: int = winner.post_position
-        w_odds: float = winner.odds / 100.0
-        if distance_key_match(distance_key, race.data.distance / 100) \
-                and (race.data.course_type == surface):
-            total_count += 1
-            # Winner post positions
-            if w_post_position == 1 or w_post_position <= 3:
-                w_count13 += 1
-                w_total_odds13 += get_odds_score(w_odds)
-            elif w_post_position == 4 or w_post_position <= 6:
-                w_count46 += 1
-                w_total_odds46 += get_odds_score(w_odds)
-            elif w_post_position == 7 or w_post_position <= 9:
-                w_count79 += 1
-                w_total_odds79 += get_odds_score(w_odds)
-            elif w_post_position == 10 or w_post_position <= 12:
-                w_count1012 += 1
-                w_total_odds1012 += get_odds_score(w_odds)
-    if total_count == 2:
-        return '2r'
-    elif total_count == 1:
-        return '1r'
-    elif total_count == 0:
-        return 'nr'
-    else:
-        w_average_odds13 = w_total_odds13 / w_count13 if w_count13 else 0.0
-        w_average_odds46 = w_total_odds46 / w_count46 if w_count46 else 0.0
-        w_average_odds79 = w_total_odds79 / w_count79 if w_count79 else 0.0
-        w_average_odds1012 = w_total_odds1012 / w_count1012 if w_count1012 else 0.0
-        sorted_scores: list[float] = sorted(
-            [w_average_odds13, w_average_odds46, w_average_odds79, w_average_odds1012],
-            reverse=True
-        )
-        high_score: float = sorted_scores[0]
-        second_score: float = sorted_scores[1]
-        percent_diff: float = round((high_score - second_score) / second_score, 2) if second_score else 2.0
-        if percent_diff > 1.0:
-            if high_score == w_average_odds13:
-                # Inside
-                ret += 'In'
-            elif high_score != w_average_odds13:
-                ret += 'Br'
-    return ret
-
+class BiasCounter:
+    '''
+    Winner counts and summed odds scores, by post position group and by running style,
+    for the races of one surface and distance key.
+    '''
+    def __init__(self, distance_key: DistanceKey):
+        self.distance_key: DistanceKey = distance_key
+        self.total_count: int = 0
+        # Posts 1-3, 4-6, 7-9 and 10-12
+        self.post_position_counts: list[int] = [0, 0, 0, 0]
+        self.post_position_odds: list[float] = [0, 0, 0, 0]
+        # Early, presser and closer
+        self.running_style_counts: list[int] = [0, 0, 0]
+        self.running_style_odds: list[float] = [0, 0, 0]
 
-def get_running_style_bias_comment(surface: str, distance_key: DistanceKey, chart: Chart) -> str:
-    ret = ''
-    total_count: int = 0
-    w_count_e: int = 0
-    w_count_p: int = 0
-    w_count_s: int = 0
-    w_total_odds_e: float = 0
-    w_total_odds_p: float = 0
-    w_total_odds_s: float = 0
-    w_average_odds_e: float = 0
-    w_average_odds_p: float = 0
-    w_average_odds_s: float = 0
-    for race in chart.races:
-        if race.data.breed_indicator != 'TB':
-            continue
-        winner: StarterPerformanceData = race.starters[0]
-        if distance_key is DistanceKey.SPRINT:
+    def add(self, winner: StarterPerformanceData) -> None:
+        self.total_count += 1
+        w_post_position: int = winner.post_position
+        w_odds_score: float = get_odds_score(winner.odds / 100.0)
+        if w_post_position <= 3:
+            self.post_position_counts[0] += 1
+            self.post_position_odds[0] += w_odds_score
+        elif w_post_position <= 6:
+            self.post_position_counts[1] += 1
+            self.post_position_odds[1] += w_odds_score
+        elif w_post_position <= 9:
+            self.post_position_counts[2] += 1
+            self.post_position_odds[2] += w_odds_score
+        elif w_post_position <= 12:
+            self.post_position_counts[3] += 1
+            self.post_position_odds[3] += w_odds_score
+        if self.distance_key is DistanceKey.SPRINT:
             w_bl1: float = winner.length_behind_at_poc1 / 100
         else:
             w_bl1: float = winner.length_behind_at_poc2 / 100
-        w_odds: float = winner.odds / 100.0
-        if distance_key_match(distance_key, race.data.distance / 100) \
-                and (race.data.course_type == surface):
-            total_count += 1
-            if w_bl1 < 1:
-                w_count_e += 1
-                w_total_odds_e += get_odds_score(w_odds)
-            elif w_bl1 >= 1 and w_bl1 <= 5:
-                w_count_p += 1
-                w_total_odds_p += get_odds_score(w_odds)
-            else:
-                w_count_s += 1
-                w_total_odds_s += get_odds_score(w_odds)
-    if total_count == 2:
-        return '2r'
-    elif total_count == 1:
-        return '1r'
-    elif total_count == 0:
-        return 'nr'
-    else:
-        w_average_odds_e = w_total_odds_e / w_count_e if w_count_e else 0.0
-        w_average_odds_p = w_total_odds_p / w_count_p if w_count_p else 0.0
-        w_average_odds_s = w_total_odds_s / w_count_s if w_count_s else 0.0
-        sorted_scores: list[float] = sorted([w_average_odds_e, w_average_odds_p, w_average_odds_s], reverse=True)
-        high_score: float = sorted_scores[0]
-        second_score: float = sorted_scores[1]
-        percent_diff: float = round((high_score - second_score) / second_score, 2) if second_score else 1.9
-        if percent_diff > 1.0:
-            if high_score == w_average_odds_e:
-                # Speed
-                ret += 'Sp'
-            elif high_score == w_average_odds_p:
-                ret += 'St'
-            elif high_score == w_average_odds_s:
-                ret += 'Cl'
-    return ret
+        if w_bl1 < 1:
+            self.running_style_counts[0] += 1
+            self.running_style_odds[0] += w_odds_score
+        elif w_bl1 >= 1 and w_bl1 <= 5:
+            self.running_style_counts[1] += 1
+            self.running_style_odds[1] += w_odds_score
+        else:
+            self.running_style_counts[2] += 1
+            self.running_style_odds[2] += w_odds_score
 
+    def get_post_position_comment(self) -> str:
+        ret = ''
+        if self.total_count == 2:
+            return '2r'
+        elif self.total_count == 1:
+            return '1r'
+        elif self.total_count == 0:
+            return 'nr'
+        else:
+            averages: list[float] = [
+                total_odds / count if count else 0.0
+                for count, total_odds in zip(self.post_position_counts, self.post_position_odds)
+            ]
+            sorted_scores: list[float] = sorted(averages, reverse=True)
+            high_score: float = sorted_scores[0]
+            second_score: float = sorted_scores[1]
+            percent_diff: float = round((high_score - second_score) / second_score, 2) if second_score else 2.0
+            if percent_diff > 1.0:
+                if high_score == averages[0]:
+                    # Inside
+                    ret += 'In'
+                else:
+                    ret += 'Br'
+        return ret
 
-def get_daily_comment(surface: str, distance_key: DistanceKey, chart: Chart) -> str:
-    ret: str = ''
-    pp_bias_comment: str = get_post_position_bias_comment(surface, distance_key, chart)
-    rs_bias_comment: str = get_running_style_bias_comment(surface, distance_key, chart)
-    if pp_bias_comment in ('2r', '1r', 'nr'):
-        return pp_bias_comment
-    else:
+    def get_running_style_comment(self) -> str:
+        ret = ''
+        if self.total_count == 2:
+            return '2r'
+        elif self.total_count == 1:
+            return '1r'
+        elif self.total_count == 0:
+            return 'nr'
+        else:
+            averages: list[float] = [
+                total_odds / count if count else 0.0
+                for count, total_odds in zip(self.running_style_counts, self.running_style_odds)
+            ]
+            sorted_scores: list[float] = sorted(averages, reverse=True)
+            high_score: float = sorted_scores[0]
+            second_score: float = sorted_scores[1]
+            percent_diff: float = round((high_score - second_score) / second_score, 2) if second_score else 1.9
+            if percent_diff > 1.0:
+                if high_score == averages[0]:
+                    # Speed
+                    ret += 'Sp'
+                elif high_score == averages[1]:
+                    ret += 'St'
+                elif high_score == averages[2]:
+                    ret += 'Cl'
+        return ret
+
+    def get_comment(self) -> str:
+        ret: str = ''
+        pp_bias_comment: str = self.get_post_position_comment()
+        if pp_bias_comment in ('2r', '1r', 'nr'):
+            return pp_bias_comment
+        rs_bias_comment: str = self.get_running_style_comment()
         if pp_bias_comment != '':
             ret += pp_bias_comment
         if rs_bias_comment != '':
             if pp_bias_comment != '':
                 ret += ','
             ret += rs_bias_comment
-    if ret == '':
-        ret = '-'
-    return ret
+        if ret == '':
+            ret = '-'
+        return ret
+
+    def __str__(self):
+        ret = ''
+        for k, v in vars(self).items():
+            ret += f'{k}={v}, '
+        return f'BiasCounter({ret[:-2]})'
+
+    def __repr__(self):
+        ret = ''
+        for k, v in vars(self).items():
+            ret += f'{k}={v}, '
+        return f'BiasCounter({ret[:-2]})'
+
+
+def get_bias_counter(surface: str, distance_key: DistanceKey, chart: Chart) -> BiasCounter:
+    counter: BiasCounter = BiasCounter(distance_key)
+    for race in chart.races:
+        if race.data.breed_indicator != 'TB':
+            continue
+        winner: StarterPerformanceData = race.starters[0]
+        if distance_key_match(distance_key, race.data.distance / 100) \
+                and (race.data.course_type == surface):
+            counter.add(winner)
+    return counter
+
+
+def get_post_position_bias_comment(surface: str, distance_key: DistanceKey, chart: Chart) -> str:
+    return get_bias_counter(surface, distance_key, chart).get_post_position_comment()
+
+
+def get_running_style_bias_comment(surface: str, distance_key: DistanceKey, chart: Chart) -> str:
+    return get_bias_counter(surface, distance_key, chart).get_running_style_comment()
+
+
+def get_daily_comment(surface: str, distance_key: DistanceKey, chart: Chart) -> str:
+    return get_bias_counter(surface, distance_key, chart).get_comment()
 
 
 def decimal_to_fifths(frac: float) -> float:
@@ -363,35 +784,40 @@ def get_shakeup_daily_minimums(surface: str, distance_key: DistanceKey, reports:
     return (minimum1, minimum2, minimum3)
 
 
+def get_shakeup_report(chart: Chart, race: Race) -> ShakeUpReport:
+    winner: StarterPerformanceData = race.starters[0]
+    assert winner.official_finish == 1
+    return ShakeUpReport(
+        key=f'{chart.race_date}{race.data.race_number:02d}',
+        cls=race.data.race_type,
+        claiming_price=race.data.maximum_claiming_price,
+        purse=race.data.purse,
+        surface=race.data.course_type,
+        distance=race.data.distance,
+        post_position=winner.post_position,
+        bl1=winner.length_behind_at_poc1,
+        bl2=winner.length_behind_at_poc2,
+        bl3=winner.length_behind_at_poc3,
+        blf=winner.length_behind_at_finish,
+        fr1=race.data.fraction1,
+        fr2=race.data.fraction2,
+        fr3=race.data.fraction3,
+        finish=race.data.final_time
+    )
+
+
 def get_shakeup_reports(chart: Chart) -> list[ShakeUpReport]:
     chart_reports: list[ShakeUpReport] = []
-    for race in chart.races:
-        if race.data.breed_indicator != 'TB':
-            continue
-        winner: StarterPerformanceData = race.starters[0]
-        assert winner.official_finish == 1
-        report = ShakeUpReport(
-            key=f'{chart.race_date}{race.data.race_number:02d}',
-            cls=race.data.race_type,
-            claiming_price=race.data.maximum_claiming_price,
-            purse=race.data.purse,
-            surface=race.data.course_type,
-            distance=race.data.distance,
-            post_position=winner.post_position,
-            bl1=winner.length_behind_at_poc1,
-            bl2=winner.length_behind_at_poc2,
-            bl3=winner.length_behind_at_poc3,
-            blf=winner.length_behind_at_finish,
-            fr1=race.data.fraction1,
-            fr2=race.data.fraction2,
-            fr3=race.data.fraction3,
-            finish=race.data.final_time
-        )
-        chart_reports.append(report)
+    with timer('shakeup_reports'):
+        for race in chart.races:
+            if race.data.breed_indicator != 'TB':
+                continue
+            chart_reports.append(get_shakeup_report(chart, race))
     return chart_reports
 
 
-def create_hearts_guide(charts: list[Chart], path: str) -> None:
+def create_hearts_guide(charts: Iterable[Chart], path: str, streaming: bool = False,
+                        surfaces: list[str] | None = None) -> None:
     '''
     Header:
     (empty)  |  (Surface #1) Sprints  |  (Surface #1) Routes  |  (Surface #2) Sprints  |  (Surface #2) Routes  |  etc...
@@ -410,87 +836,17 @@ def create_hearts_guide(charts: list[Chart], path: str) -> None:
     Column D: 6F Mins and Maxes
     Column E: Comment
     Column F: Repeat, without the date, if necessary
+
+    streaming=True writes the workbook with the write-only backend, which keeps no cells in
+    memory, only one merged range per date (see StreamingGuideWriter).
+
+    charts may be any iterable, e.g. iter_track_charts, and is read DEFAULT_AGGREGATE_BATCH_SIZE
+    charts at a time, each dropped once its rows are made. Given surfaces (e.g. from
+    scan_surfaces) the header is written first and every day is written as it comes; otherwise
+    the header waits for the last chart and only the small ChartAggregate of each day is kept
+    until then.
     '''
-    if os.path.exists(path):
-        raise FileExistsError(f'{path} already exists')
-    wb: Workbook = Workbook()
-    ws: Worksheet = wb.create_sheet('Sheet1')
-    wb.active = ws
-    # Some constants
-    distance_keys: list[str] = ['Sprints', 'Routes']
-    surfaces: list[str] = get_surfaces(charts)
-    count_surfaces = len(surfaces)
-    center_alignment = Alignment(horizontal="center", vertical="center")
-    font = Font(name='Aptos Narrow', size=14, bold=True, color="000000")
-    # TODO: Get the different colors for each surface (dirt - black, turf - green, tapeta - orange, etc.)
-    # Add headers
-    row_idx: int = 1
-    column_idx: str = 'B'  # skip column A in the header
-    cell_idx: str = f'{column_idx}{row_idx}'
-    for surface in surfaces:
-        for distance_key in distance_keys:
-            header_value = f'{course_to_str(surface)} {distance_key}'
-            ws[cell_idx] = header_value
-            end_column_idx: str = chr(ord(column_idx) + 3)
-            end_cell_idx = f'{end_column_idx}{row_idx}'
-            ws.merge_cells(f'{cell_idx}:{end_cell_idx}')
-            ws[cell_idx].alignment = center_alignment
-            color = course_to_excel_color(surface)
-            font = Font(name='Aptos Narrow', size=14, bold=True, color=color)
-            ws[cell_idx].font = font
-            column_idx = chr(ord(end_column_idx) + 1)
-            # column_idx = increment_column_index(column_idx)
-            cell_idx: str = f'{column_idx}{row_idx}'
-    # Add rows of data
-    row_idx = 2
-    column_idx = 'A'
-    cell_idx: str = f'{column_idx}{row_idx}'
-    for chart in charts:
-        reports: list[ShakeUpReport] = get_shakeup_reports(chart)
-        row1: list[str | float] = []
-        row2: list[str | float] = []
-        date: datetime = datetime.strptime(chart.race_date, '%Y%m%d')
-        row1.append(date.strftime('%m/%d'))
-        row2.append('')
-        for surface in surfaces:
-            for distance_key in (DistanceKey.SPRINT, DistanceKey.ROUTE):
-                minimums: tuple[float, float, float] = get_shakeup_daily_minimums(surface, distance_key, reports)
-                maximums: tuple[float, float, float] = get_shakeup_daily_maximums(surface, distance_key, reports)
-                for minimum in minimums:
-                    row1.append(decimal_to_fifths(minimum))
-                for maximum in maximums:
-                    row2.append(decimal_to_fifths(maximum))
-                # TODO: Generate comment for each surface and distance key combination
-                row1.append(get_daily_comment(surface, distance_key, chart))
-                row2.append('')
-        row1 = ['-' if val is nan else val for val in row1]
-        row2 = ['-' if val is nan else val for val in row2]
-        ws.append(row1)
-        ws.append(row2)
-        # Merge the date cells
-        end_row_idx: int = row_idx + 1
-        end_cell_idx: str = f'{column_idx}{end_row_idx}'
-        ws.merge_cells(f'{cell_idx}:{end_cell_idx}')
-        font = Font(name='Aptos Narrow', size=14, bold=True, color='000000')
-        ws[cell_idx].alignment = center_alignment
-        ws[cell_idx].font = font
-        # Iterate over the min. and max. fraction cells and comment cell of each row and set the font
-        for i in range(2 * count_surfaces):
-            color = course_to_excel_color(surfaces[i // 2])
-            font = Font(name='Aptos Narrow', size=14, bold=True, color=color)
-            for __ in range(1, 5):
-                column_idx = chr(ord(column_idx) + 1)
-                cell_idx = f'{column_idx}{row_idx}'
-                ws[cell_idx].alignment = center_alignment
-                ws[cell_idx].font = font
-                cell_idx = f'{column_idx}{row_idx + 1}'
-                ws[cell_idx].alignment = center_alignment
-                ws[cell_idx].font = font
-        # Reset to column A; the next row index is +2
-        row_idx += 2
-        column_idx = 'A'
-        cell_idx: str = f'{column_idx}{row_idx}'
-    wb.save(path)
+    _create_guides(charts, [(path, get_hearts_guide_rows)], streaming, surfaces, shakeup=True, brohamer=False)
 
 
 def get_brohamer_daily_maximums(surface: CourseType, distance_key: DistanceKey, reports: list[BrohamerReport]) -> \
@@ -542,45 +898,351 @@ def get_brohamer_comment(surface: CourseType, distance_key: DistanceKey, reports
     return ret
 
 
+def get_brohamer_report(chart: Chart, race: Race) -> BrohamerReport:
+    winner: StarterPerformanceData = race.starters[0]
+    assert winner.official_finish == 1
+    c1: float = race.data.fraction1 if race.data.distance / 100 <= DEFAULT_MAXIMUM_SPRINT_DISTANCE else \
+        race.data.fraction2
+    c2: float = race.data.fraction2 if race.data.distance / 100 <= DEFAULT_MAXIMUM_SPRINT_DISTANCE else \
+        race.data.fraction3
+    bl1: float = winner.length_behind_at_poc1 if race.data.distance / 100 <= DEFAULT_MAXIMUM_SPRINT_DISTANCE else \
+        winner.length_behind_at_poc2
+    bl2: float = winner.length_behind_at_poc2 if race.data.distance / 100 <= DEFAULT_MAXIMUM_SPRINT_DISTANCE else \
+        winner.length_behind_at_poc3
+    return BrohamerReport(
+        key=f'{chart.race_date}{race.data.race_number:02d}',
+        cls=race.data.race_type,
+        sex=race.data.sex_restriction,
+        age=race.data.age_restriction,
+        claiming_price=race.data.maximum_claiming_price,
+        purse=race.data.purse,
+        race=race.data.race_number,
+        surface=race.data.surface,
+        course=race.data.course_type,
+        distance=race.data.distance,
+        number=race.data.number_of_horses,
+        post=winner.post_position,
+        bl1=bl1,
+        bl2=bl2,
+        c1=c1,
+        c2=c2,
+        fc=race.data.final_time
+    )
+
+
 def get_brohamer_reports(chart: Chart) -> list[BrohamerReport]:
     chart_reports: list[BrohamerReport] = []
-    for race in chart.races:
-        if race.data.breed_indicator != 'TB':
-            continue
-        winner: StarterPerformanceData = race.starters[0]
-        assert winner.official_finish == 1
-        c1: float = race.data.fraction1 if race.data.distance / 100 <= DEFAULT_MAXIMUM_SPRINT_DISTANCE else \
-            race.data.fraction2
-        c2: float = race.data.fraction2 if race.data.distance / 100 <= DEFAULT_MAXIMUM_SPRINT_DISTANCE else \
-            race.data.fraction3
-        bl1: float = winner.length_behind_at_poc1 if race.data.distance / 100 <= DEFAULT_MAXIMUM_SPRINT_DISTANCE else \
-            winner.length_behind_at_poc2
-        bl2: float = winner.length_behind_at_poc2 if race.data.distance / 100 <= DEFAULT_MAXIMUM_SPRINT_DISTANCE else \
-            winner.length_behind_at_poc3
-        report: BrohamerReport = BrohamerReport(
-            key=f'{chart.race_date}{race.data.race_number:02d}',
-            cls=race.data.race_type,
-            sex=race.data.sex_restriction,
-            age=race.data.age_restriction,
-            claiming_price=race.data.maximum_claiming_price,
-            purse=race.data.purse,
-            race=race.data.race_number,
-            surface=race.data.surface,
-            course=race.data.course_type,
-            distance=race.data.distance,
-            number=race.data.number_of_horses,
-            post=winner.post_position,
-            bl1=bl1,
-            bl2=bl2,
-            c1=c1,
-            c2=c2,
-            fc=race.data.final_time
-        )
-        chart_reports.append(report)
+    with timer('brohamer_reports'):
+        for race in chart.races:
+            if race.data.breed_indicator != 'TB':
+                continue
+            chart_reports.append(get_brohamer_report(chart, race))
     return chart_reports
 
 
-def create_brohamer_guide(charts: list[Chart], path: str) -> None:
+class FractionExtremes:
+    '''
+    Running minimum and maximum of three fractions, kept the same way as the
+    get_*_daily_minimums and get_*_daily_maximums functions (NaN never replaces a value,
+    and an untouched sentinel comes back as NaN).
+    '''
+    def __init__(self, minimum_sentinel: float):
+        self.minimum_sentinel: float = minimum_sentinel
+        self.minimums: list[float] = [minimum_sentinel, minimum_sentinel, minimum_sentinel]
+        self.maximums: list[float] = [0, 0, 0]
+
+    def add(self, fr1: float, fr2: float, fr3: float) -> None:
+        for i, fraction in enumerate((fr1, fr2, fr3)):
+            if fraction < self.minimums[i]:
+                self.minimums[i] = fraction
+            if fraction > self.maximums[i]:
+                self.maximums[i] = fraction
+
+    def get_minimums(self) -> tuple[float, float, float]:
+        minimum1, minimum2, minimum3 = [nan if val == self.minimum_sentinel else val for val in self.minimums]
+        return (minimum1, minimum2, minimum3)
+
+    def get_maximums(self) -> tuple[float, float, float]:
+        maximum1, maximum2, maximum3 = [nan if val == 0 else val for val in self.maximums]
+        return (maximum1, maximum2, maximum3)
+
+
+class ChartAggregate:
+    '''
+    Everything the guide writers need from one chart, gathered in a single pass over its races.
+
+    Winners are grouped by course and DistanceKey the same way each of the per-key functions
+    groups them: shake up fractions by the report surface and rounded distance, Brohamer
+    fractions by parsed CourseType and rounded distance, and bias comments by course type and
+    the unrounded distance, so every lookup returns what those functions would.
+
+    Pass shakeup=False or brohamer=False to skip the reports of a guide that is not being
+    written; the lookups of a skipped kind find nothing. Shake up fractions come from
+    get_shakeup_rows; get_chart_aggregates works them out for many charts at once.
+    '''
+    def __init__(self, chart: Chart, shakeup: bool = True, brohamer: bool = True,
+                 shakeup_rows: list[tuple[str, float, float, float, float]] | None = None):
+        self.race_date: str = chart.race_date
+        self.surfaces: set[str] = set()
+        self.shakeup: dict[tuple[str, DistanceKey], FractionExtremes] = {}
+        self.brohamer: dict[tuple[int, DistanceKey], FractionExtremes] = {}
+        self.bias: dict[tuple[str, DistanceKey], BiasCounter] = {}
+        self.comments: dict[tuple[str, DistanceKey], str] = {}
+        with timer('aggregate'):
+            if shakeup:
+                if shakeup_rows is None:
+                    shakeup_rows = get_shakeup_rows([chart])[0]
+                for surface, distance, fr1, fr2, fr3 in shakeup_rows:
+                    self.shakeup.setdefault(
+                        (surface, get_distance_key(distance)), FractionExtremes(1000)
+                    ).add(fr1, fr2, fr3)
+            for race in chart.races:
+                self.surfaces.add(race.data.course_type)
+                if race.data.breed_indicator != 'TB':
+                    continue
+                if brohamer:
+                    brohamer_report: BrohamerReport = get_brohamer_report(chart, race)
+                    course: int = CourseType.parse_course_type(brohamer_report.course).value
+                    self.brohamer.setdefault(
+                        (course, get_distance_key(brohamer_report.distance)), FractionExtremes(10000)
+                    ).add(brohamer_report.fr1, brohamer_report.fr2, brohamer_report.fr3)
+                distance_key: DistanceKey = get_distance_key(race.data.distance / 100)
+                self.bias.setdefault(
+                    (race.data.course_type, distance_key), BiasCounter(distance_key)
+                ).add(race.starters[0])
+
+    def get_shakeup_minimums(self, surface: str, distance_key: DistanceKey) -> tuple[float, float, float]:
+        extremes: FractionExtremes | None = self.shakeup.get((surface, distance_key))
+        return extremes.get_minimums() if extremes else (nan, nan, nan)
+
+    def get_shakeup_maximums(self, surface: str, distance_key: DistanceKey) -> tuple[float, float, float]:
+        extremes: FractionExtremes | None = self.shakeup.get((surface, distance_key))
+        return extremes.get_maximums() if extremes else (nan, nan, nan)
+
+    def get_brohamer_minimums(self, surface: CourseType, distance_key: DistanceKey) -> tuple[float, float, float]:
+        extremes: FractionExtremes | None = self.brohamer.get((surface.value, distance_key))
+        return extremes.get_minimums() if extremes else (nan, nan, nan)
+
+    def get_brohamer_maximums(self, surface: CourseType, distance_key: DistanceKey) -> tuple[float, float, float]:
+        extremes: FractionExtremes | None = self.brohamer.get((surface.value, distance_key))
+        return extremes.get_maximums() if extremes else (nan, nan, nan)
+
+    def get_daily_comment(self, surface: str, distance_key: DistanceKey) -> str:
+        # Every guide asks for the same comments, so each is only worked out once
+        comment: str | None = self.comments.get((surface, distance_key))
+        if comment is None:
+            counter: BiasCounter | None = self.bias.get((surface, distance_key))
+            comment = self.comments[(surface, distance_key)] = counter.get_comment() if counter else 'nr'
+        return comment
+
+
+def get_shakeup_rows(charts: list[Chart]) -> list[list[tuple[str, float, float, float, float]]]:
+    '''
+    The (surface, distance, fr1, fr2, fr3) of the winner of every thoroughbred race of each of
+    charts, as ShakeUpReport adjusts them, computed for all the charts in one vectorized pass.
+    '''
+    with timer('shakeup_fractions'):
+        winners: WinnerColumns = WinnerColumns.from_charts(charts)
+        fractions: ShakeUpFractions = winners.get_shakeup_fractions()
+        rows: list[tuple[str, float, float, float, float]] = list(zip(
+            winners.courses.tolist(), fractions.distance.tolist(), fractions.fr1.tolist(), fractions.fr2.tolist(),
+            fractions.fr3.tolist()
+        ))
+    ret: list[list[tuple[str, float, float, float, float]]] = []
+    start: int = 0
+    for chart in charts:
+        # WinnerColumns holds the races it keeps in chart order
+        end: int = start + sum(1 for race in chart.races if race.data.breed_indicator == 'TB' and race.starters)
+        ret.append(rows[start:end])
+        start = end
+    return ret
+
+
+def get_chart_aggregates(charts: Iterable[Chart], shakeup: bool = True, brohamer: bool = True,
+                         batch_size: int = DEFAULT_AGGREGATE_BATCH_SIZE) -> Iterator[ChartAggregate]:
+    '''
+    The ChartAggregate of every chart, in order, with the shake up fractions of batch_size
+    charts at a time worked out together.
+    '''
+    if batch_size < 1:
+        raise ValueError(f'batch_size must be at least 1, got {batch_size}')
+    iterator: Iterator[Chart] = iter(charts)
+    while batch := list(islice(iterator, batch_size)):
+        shakeup_rows: list[list[tuple[str, float, float, float, float]]] | None = \
+            get_shakeup_rows(batch) if shakeup else None
+        for i, chart in enumerate(batch):
+            yield ChartAggregate(chart, shakeup, brohamer, shakeup_rows[i] if shakeup_rows else None)
+
+
+def get_guide_header_blocks(surfaces: list[str]) -> list[tuple[str, str]]:
+    blocks: list[tuple[str, str]] = []
+    for surface in surfaces:
+        for distance_key in ('Sprints', 'Routes'):
+            blocks.append((f'{get_surface_title(surface)} {distance_key}', course_to_excel_color(surface)))
+    return blocks
+
+
+def get_guide_block_colors(surfaces: list[str]) -> list[str]:
+    return [course_to_excel_color(surface) for surface in surfaces for __ in ('Sprints', 'Routes')]
+
+
+def get_hearts_guide_rows(aggregate: ChartAggregate, surfaces: list[str]) -> \
+        tuple[list[str | float | datetime], list[str | float | datetime]]:
+    row1: list[str | float | datetime] = []
+    row2: list[str | float | datetime] = []
+    date: datetime = datetime.strptime(aggregate.race_date, '%Y%m%d')
+    row1.append(date)
+    row2.append('')
+    for surface in surfaces:
+        for distance_key in (DistanceKey.SPRINT, DistanceKey.ROUTE):
+            minimums: tuple[float, float, float] = aggregate.get_shakeup_minimums(surface, distance_key)
+            maximums: tuple[float, float, float] = aggregate.get_shakeup_maximums(surface, distance_key)
+            for minimum in minimums:
+                row1.append(decimal_to_fifths(minimum))
+            for maximum in maximums:
+                row2.append(decimal_to_fifths(maximum))
+            row1.append(aggregate.get_daily_comment(surface, distance_key))
+            row2.append('')
+    row1 = ['-' if val is nan else val for val in row1]
+    row2 = ['-' if val is nan else val for val in row2]
+    return row1, row2
+
+
+def get_daily_record_values(aggregate: ChartAggregate, surfaces: list[str]) -> list[tuple[float, float] | str]:
+    '''
+    The shake up figures of one chart in the ResultDatabaseManager.add_record format: the date,
+    then for every surface, sprints before routes, (min, max) of each fraction and the comment.
+    '''
+    values: list[tuple[float, float] | str] = [aggregate.race_date]
+    for surface in surfaces:
+        for distance_key in (DistanceKey.SPRINT, DistanceKey.ROUTE):
+            minimums: tuple[float, float, float] = aggregate.get_shakeup_minimums(surface, distance_key)
+            maximums: tuple[float, float, float] = aggregate.get_shakeup_maximums(surface, distance_key)
+            values.extend(zip(minimums, maximums))
+            values.append(aggregate.get_daily_comment(surface, distance_key))
+    return values
+
+
+def get_brohamer_guide_rows(aggregate: ChartAggregate, surfaces: list[str], course_types: list[CourseType]) -> \
+        tuple[list[str | float | datetime], list[str | float | datetime]]:
+    row1: list[str | float | datetime] = []
+    row2: list[str | float | datetime] = []
+    date: datetime = datetime.strptime(aggregate.race_date, '%Y%m%d')
+    row1.append(date)
+    row2.append('')
+    for surface, course_type in zip(surfaces, course_types):
+        for distance_key in (DistanceKey.SPRINT, DistanceKey.ROUTE):
+            minimums: tuple[float, float, float] = aggregate.get_brohamer_minimums(course_type, distance_key)
+            maximums: tuple[float, float, float] = aggregate.get_brohamer_maximums(course_type, distance_key)
+            for minimum in minimums:
+                row1.append(round(minimum, 1))
+            for maximum in maximums:
+                row2.append(round(maximum, 1))
+            row1.append(aggregate.get_daily_comment(surface, distance_key))
+            row2.append('')
+    row1 = ['-' if val is nan else val for val in row1]
+    row2 = ['-' if val is nan else val for val in row2]
+    return row1, row2
+
+
+def get_brohamer_day_rows(aggregate: ChartAggregate, surfaces: list[str]) -> \
+        tuple[list[str | float | datetime], list[str | float | datetime]]:
+    course_types: list[CourseType] = [CourseType.parse_course_type(surface) for surface in surfaces]
+    return get_brohamer_guide_rows(aggregate, surfaces, course_types)
+
+
+GuideRows = Callable[[ChartAggregate, list[str]], tuple[list[str | float | datetime], list[str | float | datetime]]]
+
+
+def _create_guides(charts: Iterable[Chart], guides: list[tuple[str, GuideRows]], streaming: bool,
+                   surfaces: list[str] | None, shakeup: bool, brohamer: bool) -> None:
+    for path, __ in guides:
+        if os.path.exists(path):
+            raise FileExistsError(f'{path} already exists')
+    aggregates: Iterable[ChartAggregate] = get_chart_aggregates(charts, shakeup, brohamer)
+    if surfaces is None:
+        # The header needs every surface, so hold the days back (as aggregates) until the last chart
+        held: list[ChartAggregate] = list(aggregates)
+        found: set[str] = set()
+        for aggregate in held:
+            found |= aggregate.surfaces
+        surfaces = sorted(found)
+        aggregates = held
+    writers: list[tuple[GuideWriter, GuideRows]] = []
+    header_blocks: list[tuple[str, str]] = get_guide_header_blocks(surfaces)
+    for path, get_rows in guides:
+        writer: GuideWriter = get_guide_writer(path, streaming)
+        writer.write_header(header_blocks)
+        writers.append((writer, get_rows))
+    colors: list[str] = get_guide_block_colors(surfaces)
+    for aggregate in aggregates:
+        for writer, get_rows in writers:
+            row1, row2 = get_rows(aggregate, surfaces)
+            with timer('workbook_append'):
+                writer.append_day(row1, row2, colors)
+    with timer('workbook_save'):
+        for writer, __ in writers:
+            writer.save()
+
+
+def _update_guide(path: str, charts_path: str, track_code: str,
+                  get_rows: GuideRows, workers: int, cache: ChartCache | None, shakeup: bool,
+                  brohamer: bool) -> list[Chart]:
+    writer: WorkbookGuideWriter = WorkbookGuideWriter.open(path)
+    surfaces: list[str] = [str_to_course(title.rsplit(' ', 1)[0]) for title in writer.get_header_titles()[::2]]
+    known_dates: set[str] = writer.get_dates()
+    chart_paths: list[str] = []
+    for chart_path in get_chart_paths(charts_path, track_code):
+        race_date: str | None = get_chart_race_date(os.path.basename(chart_path), track_code)
+        if race_date is None:
+            header: Header | None = read_chart_header(chart_path)
+            race_date = header.race_date if header else None
+        # Guides from before full dates were stored only know the month/day of their rows
+        if race_date and race_date not in known_dates and \
+                datetime.strptime(race_date, '%Y%m%d').strftime('%m/%d') not in known_dates:
+            chart_paths.append(chart_path)
+    batch: ChartBatch = load_charts(chart_paths, workers, cache, WINNERS_ONLY)
+    for failure in batch.failures:
+        print(f'[{failure.error}]: could not parse file {failure.path}')
+    new_surfaces: list[str] = [surface for surface in get_surfaces(batch.charts) if surface not in surfaces]
+    if new_surfaces:
+        writer.write_header(get_guide_header_blocks(new_surfaces))
+        surfaces += new_surfaces
+    colors: list[str] = get_guide_block_colors(surfaces)
+    for aggregate in get_chart_aggregates(batch.charts, shakeup, brohamer):
+        row1, row2 = get_rows(aggregate, surfaces)
+        with timer('workbook_append'):
+            writer.append_day(row1, row2, colors)
+    with timer('workbook_save'):
+        writer.save()
+    return batch.charts
+
+
+def update_hearts_guide(path: str, charts_path: str, track_code: str, workers: int = 1,
+                        cache: ChartCache | None = None) -> list[Chart]:
+    '''
+    Append to an existing hearts guide the charts under charts_path for dates it does not hold yet.
+
+    Dates are read from the chart file names (or their header record) so only the new charts
+    get parsed. Surfaces the header lacks are added as new blocks after the existing ones.
+    Returns the charts that were appended.
+    '''
+    return _update_guide(path, charts_path, track_code, get_hearts_guide_rows, workers, cache, shakeup=True,
+                         brohamer=False)
+
+
+def update_brohamer_guide(path: str, charts_path: str, track_code: str, workers: int = 1,
+                          cache: ChartCache | None = None) -> list[Chart]:
+    '''
+    Append to an existing Brohamer guide the charts under charts_path for dates it does not
+    hold yet; see update_hearts_guide.
+    '''
+    return _update_guide(path, charts_path, track_code, get_brohamer_day_rows, workers, cache, shakeup=False,
+                         brohamer=True)
+
+
+def create_brohamer_guide(charts: Iterable[Chart], path: str, streaming: bool = False,
+                          surfaces: list[str] | None = None) -> None:
     '''
     Header:
     (empty)  |  (Surface #1) Sprints  |  (Surface #1) Routes  |  (Surface #2) Sprints  |  (Surface #2) Routes  |  etc...
@@ -599,84 +1261,24 @@ def create_brohamer_guide(charts: list[Chart], path: str) -> None:
     Column D: FR3 Mins and Maxes
     Column E: Comment
     Column F: Repeat, without the date, if necessary
+
+    streaming=True writes the workbook with the write-only backend, which keeps no cells in
+    memory, only one merged range per date (see StreamingGuideWriter).
+
+    charts may be any iterable; see create_hearts_guide.
     '''
-    if os.path.exists(path):
-        raise FileExistsError(f'{path} already exists')
-    wb: Workbook = Workbook()
-    ws: Worksheet = wb.create_sheet('Sheet1')
-    wb.active = ws
-    # Some constants
-    distance_keys: list[str] = ['Sprints', 'Routes']
-    surfaces: list[str] = get_surfaces(charts)
-    count_surfaces = len(surfaces)
-    center_alignment = Alignment(horizontal="center", vertical="center")
-    font = Font(name='Aptos Narrow', size=14, bold=True, color="000000")
-    # Add headers
-    row_idx: int = 1
-    column_idx: int = 2  # skip column A in the header
-    cell_idx = ws.cell(row=row_idx, column=column_idx)
-    for surface in surfaces:
-        for distance_key in distance_keys:
-            header_value = f'{course_to_str(surface)} {distance_key}'
-            ws[cell_idx.coordinate] = header_value
-            end_column_idx: int = column_idx + 3
-            end_cell_idx = ws.cell(row=row_idx, column=end_column_idx)
-            ws.merge_cells(f'{cell_idx.coordinate}:{end_cell_idx.coordinate}')
-            ws[cell_idx.coordinate].alignment = center_alignment
-            color = course_to_excel_color(surface)
-            font = Font(name='Aptos Narrow', size=14, bold=True, color=color)
-            ws[cell_idx.coordinate].font = font
-            column_idx = end_column_idx + 1
-            cell_idx = ws.cell(row=row_idx, column=column_idx)
-    # Add data
-    row_idx = 2
-    column_idx = 1
-    for chart in charts:
-        reports: list[BrohamerReport] = get_brohamer_reports(chart)
-        row1: list[str | float] = []
-        row2: list[str | float] = []
-        date: datetime = datetime.strptime(chart.race_date, '%Y%m%d')
-        row1.append(date.strftime('%m/%d'))
-        row2.append('')
-        for surface in surfaces:
-            for distance_key in (DistanceKey.SPRINT, DistanceKey.ROUTE):
-                course_type: CourseType = CourseType.parse_course_type(surface)
-                minimums: tuple[float, float, float] = get_brohamer_daily_minimums(course_type, distance_key, reports)
-                maximums: tuple[float, float, float] = get_brohamer_daily_maximums(course_type, distance_key, reports)
-                for minimum in minimums:
-                    row1.append(round(minimum, 1))
-                for maximum in maximums:
-                    row2.append(round(maximum, 1))
-                row1.append(get_daily_comment(surface, distance_key, chart))
-                row2.append('')
-        row1 = ['-' if val is nan else val for val in row1]
-        row2 = ['-' if val is nan else val for val in row2]
-        ws.append(row1)
-        ws.append(row2)
-        # Merge the date cells
-        cell_idx = ws.cell(row=row_idx, column=column_idx)
-        end_row_idx: int = row_idx + 1
-        end_cell_idx = ws.cell(row=end_row_idx, column=column_idx)
-        ws.merge_cells(f'{cell_idx.coordinate}:{end_cell_idx.coordinate}')
-        font = Font(name='Aptos Narrow', size=14, bold=True, color='000000')
-        ws[cell_idx.coordinate].alignment = center_alignment
-        ws[cell_idx.coordinate].font = font
-        # Iterate over the min. and max. fraction cells and comment cell of each row and set the font
-        for i in range(2 * count_surfaces):
-            color = course_to_excel_color(surfaces[i // 2])
-            font = Font(name='Aptos Narrow', size=14, bold=True, color=color)
-            for __ in range(1, 5):
-                column_idx += 1
-                cell_idx = ws.cell(row=row_idx, column=column_idx)
-                ws[cell_idx.coordinate].alignment = center_alignment
-                ws[cell_idx.coordinate].font = font
-                cell_idx = ws.cell(row=row_idx + 1, column=column_idx)
-                ws[cell_idx.coordinate].alignment = center_alignment
-                ws[cell_idx.coordinate].font = font
-        # Reset to column A; the next row index is current row + 2
-        row_idx += 2
-        column_idx = 1
-    wb.save(path)
+    _create_guides(charts, [(path, get_brohamer_day_rows)], streaming, surfaces, shakeup=False, brohamer=True)
+
+
+def create_guides(charts: Iterable[Chart], hearts_path: str, brohamer_path: str, streaming: bool = False,
+                  surfaces: list[str] | None = None) -> None:
+    '''
+    Write the hearts guide and the Brohamer guide of the same charts in one pass: each chart
+    is aggregated once, the surfaces are found once and every bias comment is worked out once,
+    then fed to both workbooks. The arguments are those of create_hearts_guide.
+    '''
+    _create_guides(charts, [(hearts_path, get_hearts_guide_rows), (brohamer_path, get_brohamer_day_rows)],
+                   streaming, surfaces, shakeup=True, brohamer=True)
 
 
 def create_brohamer_day_report(chart: Chart, path: str) -> None:
@@ -0,0 +1,203 @@
+#! python3
+
+
+from abc import ABC, abstractmethod
+from datetime import datetime
+
+from openpyxl import Workbook, load_workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Alignment, Font
+from openpyxl.worksheet.cell_range import CellRange, MultiCellRange
+from openpyxl.worksheet.worksheet import Worksheet
+
+
+GUIDE_FONT_NAME: str = 'Aptos Narrow'
+GUIDE_FONT_SIZE: int = 14
+GUIDE_DATE_COLOR: str = '000000'
+# Dates are written as full dates and only shown as month/day, so guides spanning years stay unambiguous
+GUIDE_DATE_FORMAT: str = 'mm/dd'
+GUIDE_BLOCK_WIDTH: int = 4  # three fractions and a comment
+
+
+class GuideWriter(ABC):
+    '''
+    Writes the layout shared by the guides: a header row of merged, colored blocks
+    (one per surface and distance key) followed by two rows per race date, with the
+    date merged down column A.
+    '''
+    def __init__(self, path: str):
+        self.path: str = path
+        self.center_alignment: Alignment = Alignment(horizontal='center', vertical='center')
+        self.fonts: dict[str, Font] = {}
+
+    def get_font(self, color: str) -> Font:
+        font: Font | None = self.fonts.get(color)
+        if font is None:
+            font = Font(name=GUIDE_FONT_NAME, size=GUIDE_FONT_SIZE, bold=True, color=color)
+            self.fonts[color] = font
+        return font
+
+    @abstractmethod
+    def write_header(self, blocks: list[tuple[str, str]]) -> None:
+        '''
+        blocks holds a (title, color) pair for every block of GUIDE_BLOCK_WIDTH columns, starting at column B.
+        '''
+        pass
+
+    @abstractmethod
+    def append_day(self, row1: list[str | float | datetime], row2: list[str | float | datetime],
+                   colors: list[str]) -> None:
+        '''
+        Append the two rows of one race date; colors holds the font color of every block.
+        '''
+        pass
+
+    @abstractmethod
+    def save(self) -> None:
+        pass
+
+
+class WorkbookGuideWriter(GuideWriter):
+    '''
+    Builds the whole workbook in memory with the regular openpyxl object model.
+    '''
+    def __init__(self, path: str):
+        super().__init__(path)
+        self.workbook: Workbook = Workbook()
+        self.worksheet: Worksheet = self.workbook.create_sheet('Sheet1')
+        self.workbook.active = self.worksheet
+        self.row_idx: int = 2
+        self.header_block_count: int = 0
+
+    @staticmethod
+    def open(path: str) -> 'WorkbookGuideWriter':
+        '''
+        Reopen a guide written by WorkbookGuideWriter or StreamingGuideWriter to append to it.
+        '''
+        writer: WorkbookGuideWriter = WorkbookGuideWriter(path)
+        writer.workbook = load_workbook(path)
+        writer.worksheet = writer.workbook['Sheet1']
+        writer.row_idx = max(writer.worksheet.max_row + 1, 2)
+        writer.header_block_count = len(writer.get_header_titles())
+        return writer
+
+    def get_header_titles(self) -> list[str]:
+        titles: list[str] = []
+        column_idx: int = 2
+        while (title := self.worksheet.cell(row=1, column=column_idx).value) is not None:
+            titles.append(str(title))
+            column_idx += GUIDE_BLOCK_WIDTH
+        return titles
+
+    def get_dates(self) -> set[str]:
+        '''
+        The race dates in column A as YYYYMMDD. Guides written before dates were stored in full
+        hold month/day text, which is returned as is.
+        '''
+        dates: set[str] = set()
+        for (value,) in self.worksheet.iter_rows(min_row=2, max_col=1, values_only=True):
+            if isinstance(value, datetime):
+                dates.add(value.strftime('%Y%m%d'))
+            elif value:
+                dates.add(str(value))
+        return dates
+
+    def write_header(self, blocks: list[tuple[str, str]]) -> None:
+        # Blocks go after any already in the header, so an opened guide can gain new surfaces
+        column_idx: int = 2 + GUIDE_BLOCK_WIDTH * self.header_block_count  # skip column A in the header
+        self.header_block_count += len(blocks)
+        for title, color in blocks:
+            cell = self.worksheet.cell(row=1, column=column_idx, value=title)
+            self.worksheet.merge_cells(start_row=1, start_column=column_idx,
+                                       end_row=1, end_column=column_idx + GUIDE_BLOCK_WIDTH - 1)
+            cell.alignment = self.center_alignment
+            cell.font = self.get_font(color)
+            column_idx += GUIDE_BLOCK_WIDTH
+
+    def append_day(self, row1: list[str | float | datetime], row2: list[str | float | datetime],
+                   colors: list[str]) -> None:
+        ws: Worksheet = self.worksheet
+        ws.append(row1)
+        ws.append(row2)
+        # Merge the date cells
+        ws.merge_cells(start_row=self.row_idx, start_column=1, end_row=self.row_idx + 1, end_column=1)
+        date_cell = ws.cell(row=self.row_idx, column=1)
+        date_cell.alignment = self.center_alignment
+        date_cell.font = self.get_font(GUIDE_DATE_COLOR)
+        date_cell.number_format = GUIDE_DATE_FORMAT
+        column_idx: int = 2
+        for color in colors:
+            font: Font = self.get_font(color)
+            for __ in range(GUIDE_BLOCK_WIDTH):
+                for row_idx in (self.row_idx, self.row_idx + 1):
+                    cell = ws.cell(row=row_idx, column=column_idx)
+                    cell.alignment = self.center_alignment
+                    cell.font = font
+                column_idx += 1
+        self.row_idx += 2
+
+    def save(self) -> None:
+        self.workbook.save(self.path)
+
+
+class StreamingGuideWriter(GuideWriter):
+    '''
+    Streams rows straight to disk with openpyxl's write-only mode, so the cells of a date are
+    not kept once written. Styles are shared per color. The merged ranges (one per date for
+    the date cell) have to be kept until save, because the sheet lists them after its rows,
+    so memory still grows by one small CellRange per date. Output matches WorkbookGuideWriter.
+    '''
+    def __init__(self, path: str):
+        super().__init__(path)
+        self.workbook: Workbook = Workbook(write_only=True)
+        # A regular Workbook starts with an empty 'Sheet'; keep it so both writers produce the same file
+        self.workbook.create_sheet('Sheet')
+        self.worksheet = self.workbook.create_sheet('Sheet1')
+        self.workbook.active = self.workbook.index(self.worksheet)
+        self.merged_ranges: list[CellRange] = []
+        self.row_idx: int = 1
+
+    def get_cell(self, value: str | float | datetime | None, color: str) -> WriteOnlyCell:
+        cell: WriteOnlyCell = WriteOnlyCell(self.worksheet, value=value)
+        cell.alignment = self.center_alignment
+        cell.font = self.get_font(color)
+        return cell
+
+    def write_header(self, blocks: list[tuple[str, str]]) -> None:
+        row: list[WriteOnlyCell | None] = [None]
+        column_idx: int = 2
+        for title, color in blocks:
+            row.append(self.get_cell(title, color))
+            row.extend([None] * (GUIDE_BLOCK_WIDTH - 1))
+            self.merged_ranges.append(CellRange(min_col=column_idx, min_row=1,
+                                                max_col=column_idx + GUIDE_BLOCK_WIDTH - 1, max_row=1))
+            column_idx += GUIDE_BLOCK_WIDTH
+        self.worksheet.append(row)
+        self.row_idx = 2
+
+    def append_day(self, row1: list[str | float | datetime], row2: list[str | float | datetime],
+                   colors: list[str]) -> None:
+        date_cell: WriteOnlyCell = self.get_cell(row1[0], GUIDE_DATE_COLOR)
+        date_cell.number_format = GUIDE_DATE_FORMAT
+        styled_row1: list[WriteOnlyCell | None] = [date_cell]
+        styled_row2: list[WriteOnlyCell | None] = [None]  # merged into the date cell above
+        column_idx: int = 1
+        for color in colors:
+            for __ in range(GUIDE_BLOCK_WIDTH):
+                styled_row1.append(self.get_cell(row1[column_idx], color))
+                styled_row2.append(self.get_cell(row2[column_idx], color))
+                column_idx += 1
+        self.worksheet.append(styled_row1)
+        self.worksheet.append(styled_row2)
+        self.merged_ranges.append(CellRange(min_col=1, min_row=self.row_idx, max_col=1, max_row=self.row_idx + 1))
+        self.row_idx += 2
+
+    def save(self) -> None:
+        self.worksheet.merged_cells = MultiCellRange(set(self.merged_ranges))
+        self.workbook.save(self.path)
+
+
+def get_guide_writer(path: str, streaming: bool = False) -> GuideWriter:
+    if streaming:
+        return StreamingGuideWriter(path)
+    return WorkbookGuideWriter(path)
@@ -0,0 +1,122 @@
+#! python3
+
+
+from math import isnan
+import random
+
+import numpy as np
+import pytest
+
+pytest.importorskip('pydrf')
+
+from result_reporter.columnar import (BrohamerFigures, ShakeUpFractions, compute_brohamer_figures,  # noqa: E402
+                                      compute_shakeup_fractions, python_round)
+from result_reporter.report import BrohamerReport, ShakeUpReport  # noqa: E402
+
+
+DISTANCES: tuple[int, ...] = (400, 450, 500, 550, 600, 650, 700, 750, 800, 850, 900, 1000, 1100, 1200)
+BROHAMER_FIGURES: tuple[str, ...] = ('fr1', 'fr2', 'fr3', 'ep', 'sp', 'ap', 'fx', 'energy')
+SHAKEUP_FRACTIONS: tuple[str, ...] = ('fr1', 'fr2', 'fr3', 'finish')
+
+
+def same(expected: float, actual: float) -> bool:
+    return isnan(actual) if isnan(expected) else expected == actual
+
+
+def get_brohamer_races(count: int, seed: int = 0) -> list[dict[str, float]]:
+    '''
+    Random races in the units pydrf reports, plus the edge cases: every fifth race has a
+    missing first or second call.
+    '''
+    rng: random.Random = random.Random(seed)
+    races: list[dict[str, float]] = []
+    for i in range(count):
+        c1: float = round(rng.uniform(21.0, 50.0), 2)
+        c2: float = round(c1 + rng.uniform(22.0, 26.0), 2)
+        if i % 5 == 0:
+            c1, c2 = (0.0, c2) if i % 10 == 0 else (c1, 0.0)
+        races.append({
+            'distance': rng.choice(DISTANCES),
+            'c1': c1,
+            'c2': c2,
+            'fc': round(max(c1, c2) + rng.uniform(10.0, 60.0), 2),
+            'bl1': rng.randint(0, 1500),
+            'bl2': rng.randint(0, 1500),
+        })
+    # ep and fr1 come to 50.4 and fr3 to 50.5, so sp and fx land on the half 50.45, which
+    # round() takes up and np.round down
+    races.append({'distance': 600, 'c1': 26.19, 'c2': 52.38, 'fc': 78.52, 'bl1': 0, 'bl2': 0})
+    races.append({'distance': 800, 'c1': 52.38, 'c2': 78.57, 'fc': 104.71, 'bl1': 0, 'bl2': 0})
+    return races
+
+
+def get_brohamer_figures(races: list[dict[str, float]]) -> BrohamerFigures:
+    return compute_brohamer_figures(**{
+        name: np.array([race[name] for race in races], dtype=np.float64)
+        for name in ('distance', 'c1', 'c2', 'fc', 'bl1', 'bl2')
+    })
+
+
+def test_python_round_matches_round():
+    values: list[float] = [0.125, 0.375, 2.675, 1.005, 60.05, 60.15, 0.25, 0.35, 1.5, 2.5, -0.5, 72.45]
+    for digits in (0, 1, 2):
+        rounded: np.ndarray = python_round(np.array(values), digits)
+        assert rounded.tolist() == [round(value, digits) for value in values]
+
+
+def test_brohamer_figures_match_brohamer_report():
+    races: list[dict[str, float]] = get_brohamer_races(5000)
+    figures: BrohamerFigures = get_brohamer_figures(races)
+    for i, race in enumerate(races):
+        report: BrohamerReport = BrohamerReport(
+            key='', cls='', sex='', age='', claiming_price=0, purse=0, race=1, surface='D', course='D', number=8,
+            post=1, **race
+        )
+        for name in BROHAMER_FIGURES:
+            assert same(getattr(report, name), float(getattr(figures, name)[i])), (name, race)
+
+
+def test_brohamer_figures_cover_the_edge_cases():
+    races: list[dict[str, float]] = get_brohamer_races(5000)
+    figures: BrohamerFigures = get_brohamer_figures(races)
+    under_5f: list[int] = [i for i, race in enumerate(races) if race['distance'] < 500]
+    no_call: list[int] = [i for i, race in enumerate(races) if not race['c1'] or not race['c2']]
+    assert under_5f and no_call
+    for i in under_5f + no_call:
+        assert all(isnan(getattr(figures, name)[i]) for name in BROHAMER_FIGURES)
+    assert np.round((50.4 + 50.5) / 2, 1) != round((50.4 + 50.5) / 2, 1)
+    for i in (-2, -1):
+        assert (figures.ep[i], figures.fr1[i], figures.fr3[i]) == (50.4, 50.4, 50.5)
+        assert figures.sp[i] == figures.fx[i] == round((50.4 + 50.5) / 2, 1)
+
+
+def test_shakeup_fractions_match_shakeup_report():
+    rng: random.Random = random.Random(1)
+    races: list[dict[str, float]] = []
+    for __ in range(5000):
+        fr1: float = round(rng.uniform(21.0, 50.0), 2)
+        fr2: float = round(fr1 + rng.uniform(22.0, 26.0), 2)
+        fr3: float = round(fr2 + rng.uniform(11.0, 26.0), 2)
+        races.append({
+            'distance': rng.choice(DISTANCES),
+            'fr1': fr1,
+            'fr2': fr2,
+            'fr3': fr3,
+            'finish': round(fr3 + rng.uniform(5.0, 30.0), 2),
+            'bl1': rng.randint(0, 1500),
+            'bl2': rng.randint(0, 1500),
+            'bl3': rng.randint(0, 1500),
+            'blf': rng.randint(0, 1500),
+        })
+    fractions: ShakeUpFractions = compute_shakeup_fractions(**{
+        name: np.array([race[name] for race in races], dtype=np.float64)
+        for name in ('fr1', 'fr2', 'fr3', 'bl1', 'bl2', 'bl3', 'blf', 'distance', 'finish')
+    })
+    assert {race['distance'] < 600 for race in races} == {True, False}
+    for i, race in enumerate(races):
+        report: ShakeUpReport = ShakeUpReport(
+            key='', cls='', claiming_price=0, purse=0, surface='D', post_position=1, **race
+        )
+        assert report.distance == fractions.distance[i]
+        for name in SHAKEUP_FRACTIONS:
+            assert same(getattr(report, name), float(getattr(fractions, name)[i])), (name, race)
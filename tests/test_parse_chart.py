@@ -0,0 +1,45 @@
+#! python3
+
+
+from datetime import date
+
+import pytest
+
+pytest.importorskip('pydrf')
+
+from drf_generator import generate  # noqa: E402
+
+from result_reporter.cache import ChartCache  # noqa: E402
+from result_reporter.utils import ChartBatch, ChartFilter, load_charts, parse_chart  # noqa: E402
+
+
+@pytest.mark.parametrize('workers', [1, 2])
+def test_load_charts_reports_missing_files(tmp_path, workers):
+    chart_paths: list[str] = generate(str(tmp_path / 'charts'), 2, ['CD'], start=date(2024, 1, 5))
+    missing: str = str(tmp_path / 'charts' / 'CD20240107.txt')
+
+    batch: ChartBatch = load_charts([*chart_paths, missing], workers)
+
+    assert [chart.race_date for chart in batch.charts] == ['20240105', '20240106']
+    assert [failure.path for failure in batch.failures] == [missing]
+    assert batch.failures[0].error.startswith('FileNotFoundError')
+    assert parse_chart(missing) is None
+
+
+def test_filtered_parse_does_not_answer_unfiltered_cache_lookups(tmp_path):
+    first, second = generate(str(tmp_path / 'charts'), 2, ['CD'], start=date(2024, 1, 5))
+    path: str = str(tmp_path / 'cards.txt')
+    with open(path, 'w') as chart_file:
+        for chart_path in (first, second):
+            with open(chart_path) as card_file:
+                chart_file.write(card_file.read())
+    cache: ChartCache = ChartCache(str(tmp_path / 'cache'))
+    chart_filter: ChartFilter = ChartFilter('20240105', '20240105')
+
+    filtered = parse_chart(path, cache, chart_filter=chart_filter)
+    unfiltered = parse_chart(path, cache)
+
+    assert len(filtered.races) == len(parse_chart(path, chart_filter=chart_filter).races)
+    assert len(unfiltered.races) == len(parse_chart(path).races) > len(filtered.races)
+    assert len(parse_chart(path, cache, chart_filter=chart_filter).races) == len(filtered.races)
+    assert len(parse_chart(path, cache).races) == len(unfiltered.races)
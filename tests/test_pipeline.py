@@ -0,0 +1,56 @@
+#! python3
+
+
+from datetime import date
+
+import pytest
+
+pytest.importorskip('pydrf')
+
+from drf_generator import generate  # noqa: E402
+
+from result_reporter.coursetype import CourseType  # noqa: E402
+from result_reporter.pipeline import ChartPipeline, PipelineResult  # noqa: E402
+from result_reporter.storage import RECORD_STATS, SQLiteBackend, StorageSession  # noqa: E402
+from result_reporter.utils import (WINNERS_ONLY, ChartAggregate, ChartFilter, get_charts,  # noqa: E402
+                                   get_daily_record_values, scan_surfaces)
+
+
+def get_backend(surfaces: list[str]) -> SQLiteBackend:
+    backend: SQLiteBackend = SQLiteBackend()
+    backend.create_table_if_not_exists('RESULTS', [
+        (f'{CourseType.parse_course_type(surface).course_to_str().upper().replace(" ", "_")}_{race_type}_{stat}',
+         'TEXT' if stat == 'COMMENT' else 'REAL')
+        for surface in surfaces for race_type in ('SPRINT', 'ROUTE') for stat in RECORD_STATS
+    ])
+    return backend
+
+
+def get_rows(backend: SQLiteBackend) -> list:
+    def fetch(session: StorageSession) -> list:
+        session.execute('SELECT * FROM RESULTS ORDER BY DATE;')
+        return session.fetchall()
+
+    return backend.run(fetch)
+
+
+@pytest.mark.parametrize('workers', [1, 2])
+def test_pipeline_writes_the_daily_records_of_every_chart(tmp_path, workers):
+    charts_path: str = str(tmp_path / 'charts')
+    chart_paths: list[str] = generate(charts_path, 6, ['CD'], start=date(2025, 1, 5))
+    surfaces: list[str] = scan_surfaces(chart_paths)
+    expected: SQLiteBackend = get_backend(surfaces)
+    expected.add_records('RESULTS', [
+        get_daily_record_values(ChartAggregate(chart), surfaces)
+        for chart in get_charts(charts_path, 'CD', finish_positions=WINNERS_ONLY)
+    ])
+    backend: SQLiteBackend = get_backend(surfaces)
+    pipeline: ChartPipeline = ChartPipeline(backend, 'RESULTS', surfaces, workers=workers, queue_size=2, batch_size=4)
+
+    result: PipelineResult = pipeline.run_paths([*chart_paths, str(tmp_path / 'missing.txt')])
+
+    assert result.records == 6 and result.duplicates == []
+    assert [failure.path for failure in result.failures] == [str(tmp_path / 'missing.txt')]
+    assert [stage.name for stage in result.stages] == ['read', 'parse', 'aggregate', 'write']
+    assert get_rows(backend) == get_rows(expected)
+    assert pipeline.run(charts_path, 'CD', ChartFilter('20250109')).duplicates == ['20250109', '20250110']
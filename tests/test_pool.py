@@ -0,0 +1,144 @@
+#! python3
+
+
+from threading import Thread
+import time
+
+import pytest
+
+pytest.importorskip('mssql_python')
+
+from mssql_python.exceptions import OperationalError  # noqa: E402
+
+from result_reporter.pool import ConnectionPool, PooledConnection  # noqa: E402
+
+
+class FakeCursor:
+    def __init__(self, connection: 'FakeConnection'):
+        self.connection: FakeConnection = connection
+
+    def execute(self, query_string: str, parameters=None) -> None:
+        if self.connection.broken:
+            raise OperationalError('connection is broken')
+        self.connection.statements.append(query_string)
+
+    def fetchall(self) -> list:
+        return [(1,)]
+
+    def close(self) -> None:
+        pass
+
+
+class FakeConnection:
+    def __init__(self):
+        self.broken: bool = False
+        self.closed: bool = False
+        self.statements: list[str] = []
+
+    def cursor(self) -> FakeCursor:
+        return FakeCursor(self)
+
+    def commit(self) -> None:
+        pass
+
+    def rollback(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.closed = True
+
+
+class FakePool(ConnectionPool):
+    '''
+    A ConnectionPool whose connections are FakeConnections, so no SQL Server is needed.
+    '''
+    def __init__(self, *args, **kwargs):
+        super().__init__('', *args, **kwargs)
+        self.opened: list[FakeConnection] = []
+
+    def open_connection(self) -> PooledConnection:
+        connection: FakeConnection = FakeConnection()
+        self.opened.append(connection)
+        return PooledConnection(connection)
+
+
+def execute(pooled: PooledConnection) -> str:
+    pooled.execute('SELECT 1;')
+    return 'done'
+
+
+def test_pool_never_opens_more_than_max_size_connections():
+    pool: FakePool = FakePool(max_size=3, timeout=5.0)
+
+    def work() -> None:
+        for __ in range(50):
+            with pool.connection() as pooled:
+                pooled.execute('SELECT 1;')
+                time.sleep(0.0001)
+
+    threads: list[Thread] = [Thread(target=work) for __ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(pool.opened) <= 3
+    assert pool.size == len(pool.idle) == len(pool.opened)
+
+
+def test_acquire_times_out_when_every_connection_is_in_use():
+    pool: FakePool = FakePool(max_size=1, timeout=0.05)
+    pooled: PooledConnection = pool.acquire()
+    with pytest.raises(TimeoutError):
+        pool.acquire()
+    pool.release(pooled)
+    assert pool.acquire() is pooled
+
+
+def test_a_waiting_thread_gets_the_connection_that_is_released():
+    pool: FakePool = FakePool(max_size=1, timeout=5.0)
+    pooled: PooledConnection = pool.acquire()
+    acquired: list[PooledConnection] = []
+    waiter: Thread = Thread(target=lambda: acquired.append(pool.acquire()))
+    waiter.start()
+    time.sleep(0.05)
+    pool.discard(pooled)
+    waiter.join(1.0)
+
+    assert len(acquired) == 1 and acquired[0] is not pooled
+    assert pool.size == 1
+
+
+def test_run_retries_on_a_new_connection():
+    pool: FakePool = FakePool(max_size=2)
+    first: PooledConnection = pool.acquire()
+    second: PooledConnection = pool.acquire()
+    pool.release(first)
+    pool.release(second)
+    first.connection.broken = second.connection.broken = True
+
+    assert pool.run(execute) == 'done'
+    assert len(pool.opened) == 3
+    assert pool.opened[0].closed or pool.opened[1].closed
+    assert pool.size <= 2
+
+
+def test_dead_idle_connections_are_replaced_after_the_health_check():
+    pool: FakePool = FakePool(max_size=1, health_check_interval=0.0)
+    with pool.connection() as pooled:
+        pass
+    pooled.connection.broken = True
+
+    with pool.connection() as replacement:
+        assert replacement is not pooled
+    assert pooled.connection.closed and pool.size == 1
+
+
+def test_close_closes_the_idle_connections():
+    pool: FakePool = FakePool(max_size=2)
+    with pool.connection():
+        pass
+    pool.close()
+
+    assert all(connection.closed for connection in pool.opened)
+    assert pool.size == 0 and pool.idle == []
@@ -0,0 +1,35 @@
+#! python3
+
+
+import pytest
+
+pytest.importorskip('pydrf')
+
+from pydrf.textchart import RecordType, StarterPerformanceData  # noqa: E402
+
+from result_reporter import recordlayout  # noqa: E402
+from result_reporter.recordlayout import get_official_finish_column, get_probe_line  # noqa: E402
+
+
+@pytest.fixture
+def fresh_column():
+    get_official_finish_column.cache_clear()
+    yield
+    get_official_finish_column.cache_clear()
+
+
+def test_official_finish_column_is_found(fresh_column, capsys):
+    column: int | None = get_official_finish_column()
+
+    assert column is not None
+    line: list[str] = get_probe_line(RecordType.STARTER.value)
+    line[column] = '1'
+    assert StarterPerformanceData.create(line).official_finish == 1
+    assert capsys.readouterr().out == ''
+
+
+def test_a_missing_official_finish_column_is_reported(fresh_column, capsys, monkeypatch):
+    monkeypatch.setattr(recordlayout, 'find_field_columns', lambda *args: {'official_finish': None})
+
+    assert get_official_finish_column() is None
+    assert 'official_finish' in capsys.readouterr().out
@@ -0,0 +1,159 @@
+#! python3
+
+
+from datetime import date
+from decimal import Decimal
+
+from result_reporter.coursetype import CourseType
+from result_reporter.racetype import RaceType
+from result_reporter.recordcache import RecordCache, RecordKey
+from result_reporter.storage import RECORD_STATS, SQLiteBackend, StorageSession
+
+
+COURSES: tuple[str, ...] = ('DIRT', 'INNER_TURF', 'TURF')
+
+
+def get_columns(courses: tuple[str, ...] = COURSES) -> list[tuple[str, str]]:
+    return [
+        (f'{course}_{race_type}_{stat}', 'TEXT' if stat == 'COMMENT' else 'REAL')
+        for course in courses for race_type in ('SPRINT', 'ROUTE') for stat in RECORD_STATS
+    ]
+
+
+def get_values(race_date: str, base: float, courses: tuple[str, ...] = COURSES) -> list[tuple[float, float] | str]:
+    '''
+    An add_record row whose fractions tell course, race type and stat apart: base + 100 * course
+    + 10 * race type + the position of the pair.
+    '''
+    values: list[tuple[float, float] | str] = [race_date]
+    for i, course in enumerate(courses):
+        for j, race_type in enumerate(('SPRINT', 'ROUTE')):
+            offset: float = base + 100 * i + 10 * j
+            values.extend([(offset + 1, offset + 2), (offset + 3, offset + 4), (offset + 5, offset + 6)])
+            values.append(f'{course} {race_type}')
+    return values
+
+
+def test_turf_and_inner_turf_columns_are_kept_apart():
+    backend: SQLiteBackend = SQLiteBackend()
+    backend.create_table_if_not_exists('RESULTS', get_columns())
+    backend.add_record('RESULTS', get_values('20250105', 0.0))
+
+    assert backend.get_record('RESULTS', '20250105', CourseType.TURF, RaceType.SPRINT) == \
+        [201.0, 202.0, 203.0, 204.0, 205.0, 206.0, 'TURF SPRINT']
+    assert backend.get_record('RESULTS', '20250105', CourseType.INNER_TURF, RaceType.ROUTE) == \
+        [111.0, 112.0, 113.0, 114.0, 115.0, 116.0, 'INNER_TURF ROUTE']
+    assert list(backend.get_records('RESULTS', '20250101', '20250131', CourseType.TURF, RaceType.ROUTE).columns) == \
+        [f'TURF_ROUTE_{stat}' for stat in RECORD_STATS]
+
+    backend.migrate_to_long_table('RESULTS', 'RESULTS_LONG')
+    for course in (CourseType.DIRT, CourseType.INNER_TURF, CourseType.TURF):
+        for race_type in (RaceType.SPRINT, RaceType.ROUTE):
+            assert backend.get_long_record('RESULTS_LONG', '20250105', course, race_type) == \
+                backend.get_record('RESULTS', '20250105', course, race_type)
+
+
+def get_backend(record_cache: RecordCache | None = None) -> SQLiteBackend:
+    backend: SQLiteBackend = SQLiteBackend(record_cache=record_cache)
+    backend.create_table_if_not_exists('RESULTS', get_columns())
+    return backend
+
+
+def count_rows(backend: SQLiteBackend, table_name: str) -> int:
+    def fetch(session: StorageSession) -> list:
+        session.execute(f'SELECT COUNT(*) FROM {table_name};')
+        return session.fetchall()
+
+    return backend.run(fetch)[0][0]
+
+
+def test_add_record_keeps_the_first_row_of_a_date():
+    backend: SQLiteBackend = get_backend()
+    backend.add_record('RESULTS', get_values('20250105', 0.0))
+    backend.add_record('RESULTS', get_values('2025-01-05', 1000.0))
+
+    assert count_rows(backend, 'RESULTS') == 1
+    assert backend.get_record('RESULTS', '20250105', CourseType.DIRT, RaceType.SPRINT)[:2] == [1.0, 2.0]
+
+
+def test_add_records_returns_the_dates_it_skipped():
+    backend: SQLiteBackend = get_backend()
+    backend.add_record('RESULTS', get_values('20250105', 0.0))
+    records: list[list[tuple[float, float] | str]] = [
+        get_values('20250105', 0.0), get_values('20250106', 0.0), get_values('2025-01-06', 0.0),
+        get_values('20250107', 0.0),
+    ]
+
+    assert backend.add_records('RESULTS', records, batch_size=2) == ['20250105', '2025-01-06']
+    assert count_rows(backend, 'RESULTS') == 3
+    assert backend.add_records('RESULTS', records) == ['20250105', '20250106', '2025-01-06', '20250107']
+
+
+def test_get_record_and_get_records_read_the_same_values():
+    backend: SQLiteBackend = get_backend()
+    backend.add_records('RESULTS', [get_values(f'2025010{day}', 1000.0 * day) for day in (7, 5, 6)])
+
+    assert backend.get_record('RESULTS', '20250104', CourseType.DIRT, RaceType.SPRINT) == []
+    frame = backend.get_records('RESULTS', '20250105', '20250106', CourseType.DIRT, RaceType.ROUTE)
+    assert list(frame.index) == ['2025-01-05', '2025-01-06']
+    for race_date, row in frame.iterrows():
+        assert list(row) == backend.get_record('RESULTS', race_date, CourseType.DIRT, RaceType.ROUTE)
+    assert frame.loc['2025-01-06'].tolist() == [6011.0, 6012.0, 6013.0, 6014.0, 6015.0, 6016.0, 'DIRT ROUTE']
+
+
+def test_migrate_to_long_table_can_be_run_again():
+    backend: SQLiteBackend = get_backend()
+    backend.add_records('RESULTS', [get_values(f'2025010{day}', 1000.0 * day) for day in (5, 6)])
+
+    rows: int = backend.migrate_to_long_table('RESULTS', 'RESULTS_LONG', batch_size=5)
+    assert rows == count_rows(backend, 'RESULTS_LONG') == 2 * len(COURSES) * 2 * len(RECORD_STATS)
+    assert backend.migrate_to_long_table('RESULTS', 'RESULTS_LONG') == rows
+    assert count_rows(backend, 'RESULTS_LONG') == rows
+    frame = backend.get_long_records('RESULTS_LONG', '20250101', '20250131', CourseType.INNER_TURF, RaceType.SPRINT)
+    assert frame.loc['2025-01-06'].tolist() == [6101.0, 6102.0, 6103.0, 6104.0, 6105.0, 6106.0, 'INNER_TURF SPRINT']
+
+
+def test_writes_invalidate_the_record_cache():
+    record_cache: RecordCache = RecordCache(recent_days=0, ttl=3600.0)
+    backend: SQLiteBackend = get_backend(record_cache)
+    key: RecordKey = RecordCache.get_key('RESULTS', '20250105', CourseType.DIRT, RaceType.SPRINT)
+
+    assert backend.get_record('RESULTS', '20250105', CourseType.DIRT, RaceType.SPRINT) == []
+    assert record_cache.get(key) == []
+    backend.add_record('RESULTS', get_values('20250105', 0.0))
+    assert record_cache.get(key) is None
+    assert backend.get_record('RESULTS', '2025-01-05', CourseType.DIRT, RaceType.SPRINT)[:2] == [1.0, 2.0]
+
+    other_key: RecordKey = RecordCache.get_key('RESULTS', '20250106', CourseType.DIRT, RaceType.SPRINT)
+    backend.get_record('RESULTS', '20250106', CourseType.DIRT, RaceType.SPRINT)
+    backend.add_records('RESULTS', [get_values('2025-01-06', 0.0)])
+    assert record_cache.get(other_key) is None
+    assert record_cache.get(key) is not None
+
+
+def test_record_cache_keeps_records_across_runs(tmp_path):
+    path: str = str(tmp_path / 'records.sqlite')
+    key: RecordKey = RecordCache.get_key('RESULTS', '20200105', CourseType.DIRT, RaceType.SPRINT)
+    record_cache: RecordCache = RecordCache(path=path)
+    record_cache.put(key, [1.0, 2.0, 'comment'])
+    record_cache.close()
+
+    record_cache = RecordCache(path=path)
+    assert record_cache.get(key) == [1.0, 2.0, 'comment']
+    record_cache.invalidate('RESULTS', ['2020-01-05'])
+    assert record_cache.get(key) is None
+    record_cache.close()
+
+
+def test_get_record_gives_the_same_values_with_and_without_a_cache_hit():
+    class DecimalBackend(SQLiteBackend):
+        def fetch_record(self, table_name: str, race_date: str, course: CourseType, race_type: RaceType) -> list:
+            # What a SQL Server driver returns for DECIMAL and DATE columns
+            return [Decimal('22.4'), date(2025, 1, 5), 'comment']
+
+    backend: SQLiteBackend = DecimalBackend(record_cache=RecordCache())
+    miss: list = backend.get_record('RESULTS', '20250105', CourseType.DIRT, RaceType.SPRINT)
+    hit: list = backend.get_record('RESULTS', '20250105', CourseType.DIRT, RaceType.SPRINT)
+
+    assert miss == hit == [22.4, '2025-01-05', 'comment']
+    assert [type(value) for value in miss] == [type(value) for value in hit]
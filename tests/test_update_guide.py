@@ -0,0 +1,29 @@
+#! python3
+
+
+from datetime import date
+
+import pytest
+
+pytest.importorskip('pydrf')
+
+from drf_generator import generate  # noqa: E402
+
+from result_reporter.utils import WINNERS_ONLY, create_hearts_guide, get_charts, update_hearts_guide  # noqa: E402
+from result_reporter.workbook import WorkbookGuideWriter  # noqa: E402
+
+
+def test_update_keeps_the_same_month_and_day_of_a_later_year(tmp_path):
+    charts_path: str = str(tmp_path / 'charts')
+    guide_path: str = str(tmp_path / 'hearts.xlsx')
+    generate(charts_path, 3, ['CD'], start=date(2024, 1, 5))
+    create_hearts_guide(get_charts(charts_path, 'CD', finish_positions=WINNERS_ONLY), guide_path)
+
+    generate(charts_path, 3, ['CD'], start=date(2025, 1, 5), seed=1)
+    appended = update_hearts_guide(guide_path, charts_path, 'CD')
+
+    assert [chart.race_date for chart in appended] == ['20250105', '20250106', '20250107']
+    assert WorkbookGuideWriter.open(guide_path).get_dates() == {
+        '20240105', '20240106', '20240107', '20250105', '20250106', '20250107'
+    }
+    assert update_hearts_guide(guide_path, charts_path, 'CD') == []